@@ -0,0 +1,153 @@
+import numpy as np
+
+EPS = 1e-10
+
+# Таблицы k / 255 для всех значений uint8: деление заменяется выборкой из таблицы
+_UNIT_LUTS = {dtype: np.arange(256, dtype=dtype) / dtype(255) for dtype in (np.float32, np.float64)}
+
+
+def _buffer(buffer, shape, dtype, name):
+    if buffer is None:
+        return np.empty(shape, dtype=dtype)
+    if buffer.shape != shape or buffer.dtype != dtype:
+        raise ValueError(f"{name}: ожидается массив {shape} типа {np.dtype(dtype)}, "
+                         f"получен {buffer.shape} типа {buffer.dtype}")
+    return buffer
+
+
+# Каналы R, G, B в диапазоне [0, 1]
+def _unit_channels(image_array, channels, dtype):
+    if image_array.dtype == np.uint8:
+        lut = _UNIT_LUTS[np.dtype(dtype).type]
+        for c in range(3):
+            np.take(lut, image_array[..., c], out=channels[c])
+    else:
+        np.divide(np.moveaxis(image_array[..., :3], -1, 0), 255, out=channels)
+
+
+# Преобразование RGB -> HSI.
+# Возвращает массив (3, высота, ширина) с плоскостями H (градусы), S и I,
+# поэтому результат можно распаковать как H, S, I = rgb_to_hsi(image_array).
+# out — буфер под результат, work — рабочий буфер (4, высота, ширина);
+# при их повторном использовании преобразование не выделяет память под изображение.
+def rgb_to_hsi(image_array, out=None, work=None, dtype=np.float32):
+    dtype = np.dtype(dtype).type
+    shape = image_array.shape[:2]
+    out = _buffer(out, (3,) + shape, dtype, 'out')
+    work = _buffer(work, (4,) + shape, dtype, 'work')
+    H, S, I = out
+    R, G, B, T = work
+
+    _unit_channels(image_array, work[:3], dtype)
+
+    # I = (R + G + B) / 3
+    np.add(R, G, out=I)
+    I += B
+
+    # S = 1 - 3 * min(R, G, B) / (R + G + B)
+    np.minimum(R, G, out=T)
+    np.minimum(T, B, out=T)
+    T *= 3
+    np.add(I, EPS, out=S)
+    np.divide(T, S, out=S)
+    np.subtract(1, S, out=S)
+
+    I /= 3
+
+    # Числитель 0.5 * ((R - G) + (R - B)) = R - 0.5 * (G + B)
+    np.add(G, B, out=T)
+    T *= -0.5
+    T += R
+
+    # Знаменатель sqrt((R - G)^2 + (R - B) * (G - B))
+    np.subtract(R, G, out=H)
+    H *= H
+    R -= B
+    G -= B
+    R *= G
+    H += R
+    np.sqrt(H, out=H)
+    H += EPS
+
+    np.divide(T, H, out=H)
+    np.clip(H, -1, 1, out=H)
+    np.arccos(H, out=H)
+    np.degrees(H, out=H)
+
+    # После G -= B условие B > G равносильно G < 0
+    np.subtract(360, H, out=H, where=G < 0)
+
+    return out
+
+
+# Яркостная компонента I в uint8 — побайтно как (I * 255).astype(np.uint8) для
+# rgb_to_hsi(..., dtype=np.float64): те же операции в том же порядке, но только
+# для I. Целочисленная сумма каналов результат не повторяет: ошибка округления
+# float64 зависит от самих значений R, G, B, а не только от их суммы.
+# work — рабочий буфер (2, высота, ширина) float64.
+def intensity_uint8(image_array, out=None, work=None):
+    shape = image_array.shape[:2]
+    out = _buffer(out, shape, np.uint8, 'out')
+    work = _buffer(work, (2,) + shape, np.float64, 'work')
+    I, T = work
+    lut = _UNIT_LUTS[np.float64]
+
+    np.take(lut, image_array[..., 0], out=I)
+    for c in (1, 2):
+        np.take(lut, image_array[..., c], out=T)
+        I += T
+    I /= 3
+    I *= 255
+    np.copyto(out, I, casting='unsafe')
+    return out
+
+
+# Обратное преобразование HSI -> RGB (uint8).
+# hsi — результат rgb_to_hsi или кортеж (H, S, I); out — буфер (высота, ширина, 3) uint8.
+def hsi_to_rgb(hsi, out=None, work=None):
+    H, S, I = hsi
+    dtype = np.result_type(I.dtype, np.float32).type
+    shape = I.shape
+    out = _buffer(out, shape + (3,), np.uint8, 'out')
+    work = _buffer(work, (4,) + shape, dtype, 'work')
+    A, Bv, C, T = work
+
+    # Сектор тона (0: RG, 1: GB, 2: BR) и угол внутри сектора
+    np.mod(H, 360, out=T)
+    gb = T >= 120
+    br = T >= 240
+    np.subtract(T, 120, out=T, where=gb)
+    np.subtract(T, 120, out=T, where=br)
+    gb &= ~br
+    np.radians(T, out=T)
+
+    # a = I * (1 - S)
+    np.subtract(1, S, out=A)
+    A *= I
+
+    # b = I * (1 + S * cos(h) / cos(60° - h))
+    np.subtract(np.pi / 3, T, out=Bv)
+    np.cos(Bv, out=Bv)
+    np.cos(T, out=T)
+    np.divide(T, Bv, out=Bv)
+    Bv *= S
+    Bv += 1
+    Bv *= I
+
+    # c = 3 * I - (a + b)
+    np.multiply(I, 3, out=C)
+    C -= A
+    C -= Bv
+
+    # Роли a, b, c по каналам для секторов RG, GB, BR
+    for channel, choices in enumerate(((Bv, A, C), (C, Bv, A), (A, C, Bv))):
+        rg_value, gb_value, br_value = choices
+        np.copyto(T, rg_value)
+        np.copyto(T, gb_value, where=gb)
+        np.copyto(T, br_value, where=br)
+        T *= 255
+        np.rint(T, out=T)
+        np.clip(T, 0, 255, out=T)
+        out[..., channel] = T
+
+    return out
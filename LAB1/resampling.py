@@ -0,0 +1,125 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Поддерживаемые режимы передискретизации
+MODES = ('nearest', 'bilinear', 'area')
+
+
+# Размер результата: те же округления, что у растяжения в M раз и сжатия в N раз
+def _output_length(length, M, N):
+    return int(int(length * M) / N)
+
+
+# Индексная карта ближайшего соседа для одной оси.
+# Повторяет int(i * N) из compress_image и int(j / M) из stretch_image,
+# поэтому результат побитово совпадает с попиксельными циклами.
+@lru_cache(maxsize=64)
+def _nearest_index(length, M, N):
+    out_length = _output_length(length, M, N)
+    stretched = (np.arange(out_length) * N).astype(np.intp)
+    index = (stretched / M).astype(np.intp)
+    index.flags.writeable = False
+    return index
+
+
+# Левый/правый соседи и доля правого для билинейной интерполяции
+@lru_cache(maxsize=64)
+def _linear_index(length, out_length):
+    coords = (np.arange(out_length) + 0.5) * (length / out_length) - 0.5
+    coords = np.clip(coords, 0, length - 1)
+    lower = np.floor(coords).astype(np.intp)
+    upper = np.minimum(lower + 1, length - 1)
+    frac = (coords - lower).astype(np.float32)
+    for array in (lower, upper, frac):
+        array.flags.writeable = False
+    return lower, upper, frac
+
+
+# Границы области усреднения: индекс пикселя, в который попадает граница,
+# и доля этого пикселя, не вошедшая в префикс
+@lru_cache(maxsize=64)
+def _area_index(length, out_length):
+    edges = np.arange(out_length + 1) * (length / out_length)
+    edges = np.minimum(edges, length)
+    index = np.minimum(np.floor(edges), length - 1).astype(np.intp)
+    rest = (1.0 - (edges - index)).astype(np.float32)
+    widths = np.diff(edges).astype(np.float32)
+    for array in (index, rest, widths):
+        array.flags.writeable = False
+    return index, rest, widths
+
+
+def _axis_shape(ndim, axis):
+    shape = [1] * ndim
+    shape[axis] = -1
+    return shape
+
+
+def _apply_linear(array, axis, out_length):
+    lower, upper, frac = _linear_index(array.shape[axis], out_length)
+    result = np.take(array, lower, axis=axis).astype(np.float32)
+    result += (np.take(array, upper, axis=axis) - result) * frac.reshape(_axis_shape(array.ndim, axis))
+    return result
+
+
+def _apply_area(array, axis, out_length):
+    index, rest, widths = _area_index(array.shape[axis], out_length)
+    shape = _axis_shape(array.ndim, axis)
+
+    # Интеграл кусочно-постоянной функции в точке границы:
+    # сумма до пикселя включительно минус не покрытая часть самого пикселя
+    prefix = np.cumsum(array, axis=axis, dtype=np.float64)
+    bounds = np.take(prefix, index, axis=axis)
+    bounds -= np.take(array, index, axis=axis) * rest.reshape(shape)
+
+    sums = np.diff(bounds, axis=axis)
+    return (sums / widths.reshape(shape)).astype(np.float32)
+
+
+def _to_dtype(array, dtype):
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        return np.clip(np.rint(array), info.min, info.max).astype(dtype)
+    return array.astype(dtype)
+
+
+# Передискретизация в M/N раз за один проход, без промежуточного изображения
+def resample(image_array, M, N=1, mode='nearest'):
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим передискретизации: {mode}")
+
+    height, width = image_array.shape[:2]
+
+    if mode == 'nearest':
+        rows = _nearest_index(height, M, N)
+        cols = _nearest_index(width, M, N)
+        return image_array[rows[:, None], cols]
+
+    out_height = _output_length(height, M, N)
+    out_width = _output_length(width, M, N)
+    apply = _apply_linear if mode == 'bilinear' else _apply_area
+
+    resampled = apply(image_array, 0, out_height)
+    resampled = apply(resampled, 1, out_width)
+    return _to_dtype(resampled, image_array.dtype)
+
+
+# Растяжение изображения
+def stretch_image(image_array, factor, mode='nearest'):
+    return resample(image_array, factor, 1, mode)
+
+
+# Сжатие изображения
+def compress_image(image_array, factor, mode='nearest'):
+    return resample(image_array, 1, factor, mode)
+
+
+# Передискретизация в M/N раз (эквивалент растяжения и последующего сжатия)
+def resample_image(image_array, M, N, mode='nearest'):
+    return resample(image_array, M, N, mode)
+
+
+# Передискретизация за один проход
+def one_step_resample(image_array, factor, mode='nearest'):
+    return resample(image_array, 1, factor, mode)
@@ -0,0 +1,171 @@
+import argparse
+import contextlib
+import os
+import struct
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from colorspace import intensity_uint8, rgb_to_hsi
+
+# Высота полосы по умолчанию (строк за одно чтение)
+STRIP_HEIGHT = 256
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+# Построчная запись PNG: строки сжимаются и дописываются в файл по мере поступления,
+# поэтому изображение целиком в памяти не требуется
+class PngStripWriter:
+    def __init__(self, path, width, height, channels=1):
+        if channels not in (1, 3):
+            raise ValueError(f"Поддерживаются только 1 или 3 канала, получено {channels}")
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(6)
+        self._file = open(path, 'wb')
+        self._file.write(PNG_SIGNATURE)
+        color_type = 0 if channels == 1 else 2
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+
+    def _write_chunk(self, chunk_type, data):
+        self._file.write(struct.pack('>I', len(data)))
+        self._file.write(chunk_type)
+        self._file.write(data)
+        self._file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type))))
+
+    def write(self, rows):
+        rows = np.asarray(rows, dtype=np.uint8)
+        count = rows.shape[0]
+        if self.rows_written + count > self.height:
+            raise ValueError("Записано больше строк, чем указано в заголовке PNG")
+
+        # Каждая строка PNG начинается с байта фильтра (0 — без фильтра)
+        scanlines = np.zeros((count, 1 + self.width * self.channels), dtype=np.uint8)
+        scanlines[:, 1:] = rows.reshape(count, -1)
+        data = self._compressor.compress(scanlines)
+        if data:
+            self._write_chunk(b'IDAT', data)
+        self.rows_written += count
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"Записано {self.rows_written} строк из {self.height}")
+            self._write_chunk(b'IDAT', self._compressor.flush())
+            self._write_chunk(b'IEND', b'')
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    # При исключении файл только закрывается: проверка числа строк не должна
+    # подменять исходную ошибку
+    def __exit__(self, *exc_info):
+        if exc_info[0] is not None:
+            self._file.close()
+        else:
+            self.close()
+
+
+# Источник строк для обычных изображений (PNG, JPEG и т.д.). Файл открывается
+# лениво, в RGB преобразуется только запрошенная полоса. PIL не умеет
+# декодировать PNG и JPEG по частям, поэтому при первом чтении изображение
+# декодируется целиком в исходном режиме — память не ограничена высотой полосы.
+class _PilSource:
+    def __init__(self, path):
+        self._image = Image.open(path)
+        self.shape = (self._image.height, self._image.width, 3)
+
+    def __getitem__(self, rows):
+        start, stop, _ = rows.indices(self.shape[0])
+        return np.asarray(self._image.crop((0, start, self.shape[1], stop)).convert('RGB'))
+
+
+# Открытие источника: .npy и .raw отображаются в память, остальное читается через PIL
+def open_source(path, shape=None):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        return np.load(path, mmap_mode='r')
+    if extension == '.raw':
+        if shape is None:
+            raise ValueError("Для .raw необходимо указать размер изображения (высота, ширина)")
+        return np.memmap(path, dtype=np.uint8, mode='r', shape=(shape[0], shape[1], 3))
+    return _PilSource(path)
+
+
+# Потоковое разделение на каналы и экспорт яркостной компоненты.
+# Для .npy и .raw пиковое потребление памяти определяется высотой полосы, а не
+# размером изображения; PNG, JPEG и другие форматы PIL декодирует целиком
+# (см. _PilSource), полосами идут только преобразование и запись.
+def split_channels_streamed(path, output_folder, strip_height=STRIP_HEIGHT, shape=None, hsi_path=None):
+    source = open_source(path, shape)
+    height, width = source.shape[:2]
+    os.makedirs(output_folder, exist_ok=True)
+
+    with contextlib.ExitStack() as stack:
+        writers = {}
+        for name in 'RGB':
+            writers[f'{name}_component'] = PngStripWriter(
+                os.path.join(output_folder, f'{name}_component.png'), width, height, 3)
+            writers[f'{name}_channel'] = PngStripWriter(
+                os.path.join(output_folder, f'{name}_channel.png'), width, height, 1)
+        for name in ('I_component', 'I_inverted'):
+            writers[name] = PngStripWriter(os.path.join(output_folder, f'{name}.png'), width, height, 1)
+        for writer in writers.values():
+            stack.enter_context(writer)
+
+        hsi = None
+        if hsi_path is not None:
+            hsi = np.lib.format.open_memmap(hsi_path, mode='w+', dtype=np.float32, shape=(height, width, 3))
+
+        component = np.empty((strip_height, width, 3), dtype=np.uint8)
+        intensity = np.empty((strip_height, width), dtype=np.uint8)
+        intensity_work = np.empty((2, strip_height, width), dtype=np.float64)
+        if hsi is not None:
+            hsi_strip = np.empty((3, strip_height, width), dtype=np.float32)
+            hsi_work = np.empty((4, strip_height, width), dtype=np.float32)
+
+        for y0 in range(0, height, strip_height):
+            strip = np.asarray(source[y0:y0 + strip_height])[..., :3]
+            count = strip.shape[0]
+
+            # Компоненты R, G, B как цветные изображения и каналы в градациях серого
+            for c, name in enumerate('RGB'):
+                component[:count] = 0
+                component[:count, :, c] = strip[..., c]
+                writers[f'{name}_component'].write(component[:count])
+                writers[f'{name}_channel'].write(strip[..., c])
+
+            # Яркость побайтно совпадает с LAB1/main.py (HSI в float64)
+            I_component = intensity_uint8(strip, out=intensity[:count], work=intensity_work[:, :count])
+            writers['I_component'].write(I_component)
+            np.subtract(255, I_component, out=I_component)
+            writers['I_inverted'].write(I_component)
+
+            if hsi is not None:
+                H, S, I = rgb_to_hsi(strip, out=hsi_strip[:, :count], work=hsi_work[:, :count])
+                hsi[y0:y0 + count, :, 0] = H
+                hsi[y0:y0 + count, :, 1] = S
+                hsi[y0:y0 + count, :, 2] = I
+
+        if hsi is not None:
+            hsi.flush()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Потоковое разделение изображения на каналы и HSI")
+    parser.add_argument('input', help="Изображение, .npy или .raw (RGB, uint8)")
+    parser.add_argument('--output', default='pictures_results', help="Папка для результатов")
+    parser.add_argument('--shape', type=int, nargs=2, metavar=('HEIGHT', 'WIDTH'), help="Размер для .raw")
+    parser.add_argument('--strip-height', type=int, default=STRIP_HEIGHT, help="Высота полосы в строках")
+    parser.add_argument('--hsi', help="Сохранить H, S, I в .npy (float32)")
+    args = parser.parse_args()
+
+    split_channels_streamed(args.input, args.output, args.strip_height, args.shape, args.hsi)
@@ -0,0 +1,367 @@
+import os
+import sys
+from functools import partial
+
+import numpy as np
+import cv2
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.bitmap import PackedBitmap
+from common.frames import check_frame_shape
+from common.tiling import TILE_SIZE, run_tiled
+
+
+# Приведение изображения к полутоновому
+def to_grayscale(image):
+    grayscale = 0.299 * image[:, :, 2] + 0.587 * image[:, :, 1] + 0.114 * image[:, :, 0]
+    return grayscale.astype(np.uint8)
+
+
+# Бинаризация изображения (packed=True — упакованное побитово изображение)
+def binarize_image(grayscale_image, threshold=128, packed=False):
+    if packed:
+        return PackedBitmap.from_grayscale(grayscale_image, threshold)
+    binary_image = grayscale_image > threshold
+    return binary_image.astype(np.uint8) * 255
+
+
+# Полутоновое изображение для адаптивной бинаризации
+def _gray(image):
+    if len(image.shape) == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+# Границы окон по одной оси с обрезкой по краю изображения
+def window_bounds(length, half_window):
+    positions = np.arange(length)
+    lower = np.maximum(positions - half_window, 0)
+    upper = np.minimum(positions + half_window + 1, length)
+    return lower, upper
+
+
+# Размер окна по умолчанию: 1/8 минимального размера изображения
+def _window_size(window_size, height, width):
+    if window_size is None:
+        return max(1, min(width, height) // 8)
+    return window_size
+
+
+# Суммы по окнам для всех пикселей по интегральному изображению.
+# Таблица дополняется краевыми значениями, поэтому границы окон,
+# обрезанные по краю изображения, превращаются в простые срезы.
+def window_sums(integral_image, half_window):
+    height, width = integral_image.shape[0] - 1, integral_image.shape[1] - 1
+    padded = np.pad(integral_image, half_window, mode='edge')
+    side = 2 * half_window + 1
+
+    total = padded[side:side + height, side:side + width] - padded[:height, side:side + width]
+    total -= padded[side:side + height, :width]
+    total += padded[:height, :width]
+    return total
+
+
+# Количество пикселей в окне (меньше у краев изображения)
+def window_areas(height, width, half_window):
+    y1, y2 = window_bounds(height, half_window)
+    x1, x2 = window_bounds(width, half_window)
+    return np.outer(y2 - y1, x2 - x1)
+
+
+# 0, если пиксель темнее порога, иначе 255
+def _apply_threshold(gray, threshold):
+    binary = np.greater_equal(gray, threshold).view(np.uint8)
+    binary *= 255
+    return binary
+
+
+# Адаптивная бинаризация Брэдли и Рота.
+# Суммы по окнам, площади окон и пороги считаются над всем интегральным
+# изображением сразу; результат совпадает с попиксельным вариантом, включая края.
+def bradley_roth_binarization(image, window_size=15, threshold_coeff=0.85):
+    gray = _gray(image)
+    height, width = gray.shape
+    window_size = _window_size(window_size, height, width)
+
+    # Создание интегрального изображения (sdepth передается по имени: вторым
+    # позиционным аргументом cv2.integral принимает выходной массив)
+    integral_image = cv2.integral(gray, sdepth=cv2.CV_64F)
+
+    half_window = window_size // 2
+    total = window_sums(integral_image, half_window)
+    count = window_areas(height, width, half_window)
+
+    # Расчет порога
+    threshold = np.divide(total, count, out=total)
+    threshold *= threshold_coeff
+
+    return _apply_threshold(gray, threshold)
+
+
+# Бинаризация Брэдли и Рота по плиткам на пуле потоков или процессов.
+# Ореол плитки — половина окна, поэтому суммы и площади окон те же, что на целом
+# изображении, и результат совпадает с bradley_roth_binarization.
+def bradley_roth_tiled(image, window_size=15, threshold_coeff=0.85, tile_size=TILE_SIZE,
+                       workers=None, processes=False):
+    gray = _gray(image)
+    window_size = _window_size(window_size, *gray.shape)
+    tile_filter = partial(bradley_roth_binarization, window_size=window_size, threshold_coeff=threshold_coeff)
+    return run_tiled(tile_filter, gray, window_size // 2, tile_size=tile_size, workers=workers,
+                     processes=processes)
+
+
+# Методы для перебора параметров и их коэффициенты по умолчанию:
+# bradley_roth — доля локального среднего, niblack и sauvola — k,
+# bernsen — минимальный локальный контраст
+SWEEP_COEFFS = {
+    'bradley_roth': (0.85,),
+    'niblack': (-0.2,),
+    'sauvola': (0.5,),
+    'bernsen': (15,),
+}
+
+# Динамический диапазон стандартного отклонения для метода Саволы
+SAUVOLA_RANGE = 128
+
+
+# Интегральные изображения суммы и суммы квадратов, построенные один раз
+# для всех окон и коэффициентов
+class IntegralTables:
+    def __init__(self, image):
+        self.gray = _gray(image)
+        self.height, self.width = self.gray.shape
+        self.sum, self.squared_sum = cv2.integral2(self.gray, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+
+    # Локальное среднее и (при необходимости) стандартное отклонение
+    def local_statistics(self, window_size, with_std=True):
+        half_window = window_size // 2
+        count = window_areas(self.height, self.width, half_window)
+        mean = np.divide(window_sums(self.sum, half_window), count)
+        if not with_std:
+            return mean, None
+        variance = np.divide(window_sums(self.squared_sum, half_window), count)
+        variance -= mean * mean
+        np.maximum(variance, 0, out=variance)
+        return mean, np.sqrt(variance, out=variance)
+
+    # Локальные минимум и максимум (для метода Бернсена) в том же окне
+    # 2 * (window_size // 2) + 1, что и local_statistics
+    def local_extremes(self, window_size):
+        side = 2 * (window_size // 2) + 1
+        kernel = np.ones((side, side), dtype=np.uint8)
+        return cv2.erode(self.gray, kernel), cv2.dilate(self.gray, kernel)
+
+
+def _bernsen_threshold(local_min, local_max, contrast_limit):
+    threshold = local_min.astype(np.float32)
+    threshold += local_max
+    threshold /= 2
+    # В областях с низким контрастом порог — середина диапазона яркостей
+    low_contrast = (local_max - local_min) < contrast_limit
+    threshold[low_contrast] = 128
+    return threshold
+
+
+# Перебор параметров адаптивной бинаризации по общим интегральным изображениям.
+# Для каждого размера окна перебираются коэффициенты каждого метода из coeffs
+# (по умолчанию SWEEP_COEFFS). Возвращает список параметров (метод, окно, коэффициент)
+# и массив результатов (N, высота, ширина). Если задана output_folder, результаты
+# сохраняются по мере вычисления, а вместо массива возвращается None.
+def binarization_sweep(image, window_sizes, methods=('bradley_roth',), coeffs=None,
+                       output_folder=None, image_name='image.png'):
+    coeffs = {**SWEEP_COEFFS, **(coeffs or {})}
+    unknown = set(methods) - set(SWEEP_COEFFS)
+    if unknown:
+        raise ValueError(f"Неизвестные методы бинаризации: {sorted(unknown)}")
+
+    tables = IntegralTables(image)
+    gray = tables.gray
+    with_std = 'niblack' in methods or 'sauvola' in methods
+
+    params = [(method, _window_size(window_size, tables.height, tables.width), coeff)
+              for window_size in window_sizes for method in methods for coeff in coeffs[method]]
+    results = None
+    if output_folder is None:
+        results = np.empty((len(params), tables.height, tables.width), dtype=np.uint8)
+    else:
+        os.makedirs(output_folder, exist_ok=True)
+
+    index = 0
+    for window_size in window_sizes:
+        window_size = _window_size(window_size, tables.height, tables.width)
+        mean, std = tables.local_statistics(window_size, with_std)
+        extremes = tables.local_extremes(window_size) if 'bernsen' in methods else None
+
+        for method in methods:
+            for coeff in coeffs[method]:
+                if method == 'bradley_roth':
+                    threshold = mean * coeff
+                elif method == 'niblack':
+                    threshold = mean + coeff * std
+                elif method == 'sauvola':
+                    threshold = mean * (1 + coeff * (std / SAUVOLA_RANGE - 1))
+                else:
+                    threshold = _bernsen_threshold(*extremes, coeff)
+
+                binary = _apply_threshold(gray, threshold)
+                if results is None:
+                    cv2.imwrite(os.path.join(output_folder, f'{method}_{window_size}_{coeff}_{image_name}'), binary)
+                else:
+                    results[index] = binary
+                index += 1
+
+    return params, results
+
+
+# Высота полосы строк для потоковой обработки
+BAND_HEIGHT = 256
+
+
+# Разбиение изображения (массива или memmap) на полосы строк
+def iter_bands(image, band_height=BAND_HEIGHT):
+    for y0 in range(0, image.shape[0], band_height):
+        yield np.asarray(image[y0:y0 + band_height])
+
+
+# Наименьший целый тип, в котором помещаются суммы окон буфера
+def _sum_dtype(rows, width):
+    return np.int32 if 255 * rows * width < np.iinfo(np.int32).max else np.int64
+
+
+# Бинаризация Брэдли и Рота для строк буфера [y_start, y_end).
+# buffer содержит строки изображения начиная с buffer_start, total_height —
+# высота изображения (или конец буфера, пока поток не закончился).
+def _binarize_buffer_rows(buffer, buffer_start, y_start, y_end, total_height,
+                          half_window, threshold_coeff, columns):
+    rows, width = buffer.shape
+
+    # Интегральное изображение буфера в целом типе
+    integral_image = np.zeros((rows + 1, width + 1), dtype=_sum_dtype(rows, width))
+    np.cumsum(buffer, axis=1, out=integral_image[1:, 1:])
+    np.cumsum(integral_image[1:, 1:], axis=0, out=integral_image[1:, 1:])
+
+    positions = np.arange(y_start, y_end)
+    y1 = np.maximum(positions - half_window, 0) - buffer_start
+    y2 = np.minimum(positions + half_window + 1, total_height) - buffer_start
+    x1, x2 = columns
+
+    band_sums = integral_image[y2] - integral_image[y1]
+    total = band_sums[:, x2] - band_sums[:, x1]
+    count = np.outer(y2 - y1, x2 - x1)
+
+    threshold = total / count
+    threshold *= threshold_coeff
+    return _apply_threshold(buffer[y_start - buffer_start:y_end - buffer_start], threshold)
+
+
+# Потоковая бинаризация Брэдли и Рота по полосам строк.
+# В памяти хранятся только текущая полоса и 2 * (window_size // 2) строк контекста,
+# суммы считаются в целом типе. Результат совпадает с bradley_roth_binarization.
+def bradley_roth_bands(bands, window_size=15, threshold_coeff=0.85):
+    if window_size is None:
+        raise ValueError("Для потоковой обработки размер окна задается явно")
+    half_window = window_size // 2
+
+    buffer = None
+    buffer_start = 0
+    next_row = 0
+    columns = None
+
+    for band in bands:
+        band = _gray(np.asarray(band))
+        if buffer is None:
+            buffer = band
+            columns = window_bounds(band.shape[1], half_window)
+        else:
+            buffer = np.concatenate((buffer, band))
+        buffer_end = buffer_start + buffer.shape[0]
+
+        # Готовы строки, окна которых целиком попали в буфер
+        ready_end = buffer_end - half_window
+        if ready_end > next_row:
+            yield _binarize_buffer_rows(buffer, buffer_start, next_row, ready_end, buffer_end,
+                                        half_window, threshold_coeff, columns)
+            next_row = ready_end
+
+        # Оставляем только строки, нужные следующим окнам
+        keep_from = max(next_row - half_window, buffer_start)
+        buffer = buffer[keep_from - buffer_start:]
+        buffer_start = keep_from
+
+    # Последние строки: окна обрезаются по нижнему краю изображения
+    if buffer is not None:
+        buffer_end = buffer_start + buffer.shape[0]
+        if buffer_end > next_row:
+            yield _binarize_buffer_rows(buffer, buffer_start, next_row, buffer_end, buffer_end,
+                                        half_window, threshold_coeff, columns)
+
+
+# Потоковая бинаризация .npy-файла (memmap) с записью результата в .npy
+def bradley_roth_file(input_path, output_path, window_size=15, threshold_coeff=0.85,
+                      band_height=BAND_HEIGHT):
+    image = np.load(input_path, mmap_mode='r')
+    result = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.uint8, shape=image.shape[:2])
+    y0 = 0
+    for binary in bradley_roth_bands(iter_bands(image, band_height), window_size, threshold_coeff):
+        result[y0:y0 + binary.shape[0]] = binary
+        y0 += binary.shape[0]
+    result.flush()
+    return output_path
+
+
+# Обработчик потока кадров одного размера: полутоновое изображение, глобальная
+# бинаризация и бинаризация Брэдли и Рота. Все буферы и площади окон создаются
+# один раз при настройке на форму кадра, обработка кадра память не выделяет.
+# Суммы по окнам считает cv2.boxFilter без нормировки; в float64 они точные,
+# поэтому результат совпадает с to_grayscale, binarize_image и
+# bradley_roth_binarization. Возвращаемые массивы перезаписываются следующим кадром.
+class BinarizationStream:
+    def __init__(self, shape, window_size=15, threshold=128, threshold_coeff=0.85):
+        self.shape = tuple(shape)
+        height, width = self.shape[:2]
+        self.threshold = threshold
+        self.threshold_coeff = threshold_coeff
+        self.window_size = _window_size(window_size, height, width)
+        half_window = self.window_size // 2
+        self.side = 2 * half_window + 1
+
+        self.count = window_areas(height, width, half_window).astype(np.float64)
+        self.weighted = np.empty((height, width), dtype=np.float64)
+        self.term = np.empty((height, width), dtype=np.float64)
+        self.total = np.empty((height, width), dtype=np.float64)
+        self.cv_gray = np.empty((height, width), dtype=np.uint8)
+        self.outputs = {name: np.empty((height, width), dtype=np.uint8)
+                        for name in ('grayscale', 'binary', 'bradley_roth_binary')}
+
+    # Полутоновое изображение с теми же весами и порядком сложения, что в to_grayscale
+    def _grayscale(self, frame, out):
+        np.multiply(frame[:, :, 2], 0.299, out=self.weighted)
+        np.multiply(frame[:, :, 1], 0.587, out=self.term)
+        self.weighted += self.term
+        np.multiply(frame[:, :, 0], 0.114, out=self.term)
+        self.weighted += self.term
+        np.copyto(out, self.weighted, casting='unsafe')
+        return out
+
+    def process(self, frame):
+        check_frame_shape(frame, self.shape)
+        out = self.outputs
+        if frame.ndim == 3:
+            grayscale = self._grayscale(frame, out['grayscale'])
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.cv_gray)
+        else:
+            grayscale = gray = frame
+            np.copyto(out['grayscale'], frame)
+
+        binary = out['binary']
+        np.greater(grayscale, self.threshold, out=binary.view(np.bool_))
+        binary *= 255
+
+        cv2.boxFilter(gray, cv2.CV_64F, (self.side, self.side), dst=self.total,
+                      normalize=False, borderType=cv2.BORDER_CONSTANT)
+        threshold = np.divide(self.total, self.count, out=self.total)
+        threshold *= self.threshold_coeff
+        binary = out['bradley_roth_binary']
+        np.greater_equal(gray, threshold, out=binary.view(np.bool_))
+        binary *= 255
+        return out
@@ -1,151 +1,147 @@
 import os
-import numpy as np
-import cv2
-import copy
+import glob
+import argparse
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-input_folder = 'LAB2/pictures_src/'
-output_folder = 'LAB2/pictures_results/'
-
-def load_image(image_name):
-    return cv2.imread(os.path.join(input_folder, image_name))
-
-def save_image(image, image_name):
-    output_path = os.path.join(output_folder, image_name)
-    cv2.imwrite(output_path, image)
-
-# Приведение изображения к полутоновому
-def to_grayscale(image):
-    grayscale = 0.299 * image[:, :, 2] + 0.587 * image[:, :, 1] + 0.114 * image[:, :, 0]
-    return grayscale.astype(np.uint8)
-
-# Бинаризация изображения
-def binarize_image(grayscale_image, threshold=128):
-    binary_image = grayscale_image > threshold
-    return binary_image.astype(np.uint8) * 255
-
-# Адаптивная бинаризация Брэдли и Рота
-def bradley_roth_binarization(image, window_size=15, threshold_coeff=0.85):
-    # Преобразование в оттенки серого, если необходимо
-    if len(image.shape) == 3:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = image.copy()
-    
-    height, width = gray.shape
-    
-    # Установка размера окна (1/8 минимального размера изображения)
-    if window_size is None:
-        window_size = max(1, min(width, height) // 8)
-    
-    # Создание интегрального изображения
-    integral_image = cv2.integral(gray, cv2.CV_64F)
-    
-    # Вычисление половины размера окна
-    half_window = window_size // 2
-    
-    # Инициализация бинарного изображения
-    binary = np.zeros_like(gray, dtype=np.uint8)
-    
-    for y in range(height):
-        for x in range(width):
-            # Определение границ окна
-            x1 = max(0, x - half_window)
-            x2 = min(width, x + half_window + 1)
-            y1 = max(0, y - half_window)
-            y2 = min(height, y + half_window + 1)
-            
-            # Вычисление суммы в окне
-            total = integral_image[y2, x2] - integral_image[y1, x2] - integral_image[y2, x1] + integral_image[y1, x1]
-            
-            # Количество пикселей в окне
-            count = (x2 - x1) * (y2 - y1)
-            
-            # Расчет порога
-            threshold = total / count * threshold_coeff
-            
-            # Применение порога
-            if gray[y, x] < threshold:
-                binary[y, x] = 0
-            else:
-                binary[y, x] = 255
-                
-    return binary
-
-image_name = 'x-ray.png'
-
-image = load_image(image_name)
-
-grayscale_image = to_grayscale(image)
-save_image(grayscale_image, 'grayscale_' + image_name)
-
-binary_image = binarize_image(grayscale_image, threshold=108)
-save_image(binary_image, 'binary_' + image_name)
-
-bradley_roth_binary_image = bradley_roth_binarization(image, window_size=15)
-save_image(bradley_roth_binary_image, 'bradley_roth_binary_' + image_name)
-
-image_name = 'text.png'
-
-image = load_image(image_name)
-
-grayscale_image = to_grayscale(image)
-save_image(grayscale_image, 'grayscale_' + image_name)
-
-binary_image = binarize_image(grayscale_image, threshold=108)
-save_image(binary_image, 'binary_' + image_name)
-
-bernsen_binary_image = bradley_roth_binarization(image, window_size=5)
-save_image(bernsen_binary_image, 'bradley_roth_binary_' + image_name)
-
-image_name = 'photo.png'
-
-image = load_image(image_name)
-
-grayscale_image = to_grayscale(image)
-save_image(grayscale_image, 'grayscale_' + image_name)
-
-binary_image = binarize_image(grayscale_image, threshold=108)
-save_image(binary_image, 'binary_' + image_name)
+import cv2
 
-bernsen_binary_image = bradley_roth_binarization(image, window_size=5)
-save_image(bernsen_binary_image, 'bradley_roth_binary_' + image_name)
+from binarization import (to_grayscale, binarize_image, bradley_roth_binarization, bradley_roth_tiled,
+                          BinarizationStream)
+from common.frames import open_frames, run_stream
 
-image_name = 'map.png'
+input_folder = 'LAB2/pictures_src/'
+output_folder = 'LAB2/pictures_results/'
 
-image = load_image(image_name)
+IMAGE_EXTENSIONS = ('.png', '.bmp', '.jpg', '.jpeg', '.tif', '.tiff')
 
-grayscale_image = to_grayscale(image)
-save_image(grayscale_image, 'grayscale_' + image_name)
+# Порог глобальной бинаризации
+GLOBAL_THRESHOLD = 108
 
-binary_image = binarize_image(grayscale_image, threshold=108)
-save_image(binary_image, 'binary_' + image_name)
+# Размер окна Брэдли и Рота: по умолчанию и для отдельных изображений
+DEFAULT_WINDOW_SIZE = 5
+WINDOW_SIZES = {'x-ray.png': 15}
 
-bernsen_binary_image = bradley_roth_binarization(image, window_size=5)
-save_image(bernsen_binary_image, 'bradley_roth_binary_' + image_name)
 
-image_name = 'house.png'
+def save_image(image, image_name, output_folder=output_folder):
+    output_path = os.path.join(output_folder, image_name)
+    cv2.imwrite(output_path, image)
 
-image = load_image(image_name)
 
-grayscale_image = to_grayscale(image)
-save_image(grayscale_image, 'grayscale_' + image_name)
+# Полутоновое изображение, глобальная и адаптивная бинаризация одного файла.
+# Возвращает имя файла и время обработки (None, если файл не удалось прочитать).
+# tile_workers — число потоков для бинаризации Брэдли и Рота по плиткам.
+def process_image(image_path, output_folder=output_folder, window_size=None, tile_workers=None):
+    start = time.perf_counter()
+    image_name = os.path.basename(image_path)
+    image = cv2.imread(image_path)
+    if image is None:
+        return image_name, None
 
-binary_image = binarize_image(grayscale_image, threshold=108)
-save_image(binary_image, 'binary_' + image_name)
+    if window_size is None:
+        window_size = WINDOW_SIZES.get(image_name, DEFAULT_WINDOW_SIZE)
 
-bernsen_binary_image = bradley_roth_binarization(image, window_size=5)
-save_image(bernsen_binary_image, 'bradley_roth_binary_' + image_name)
+    grayscale_image = to_grayscale(image)
+    save_image(grayscale_image, 'grayscale_' + image_name, output_folder)
 
-image_name = 'anime.png'
+    binary_image = binarize_image(grayscale_image, threshold=GLOBAL_THRESHOLD)
+    save_image(binary_image, 'binary_' + image_name, output_folder)
 
-image = load_image(image_name)
+    if tile_workers:
+        bradley_roth_binary_image = bradley_roth_tiled(image, window_size=window_size, workers=tile_workers)
+    else:
+        bradley_roth_binary_image = bradley_roth_binarization(image, window_size=window_size)
+    save_image(bradley_roth_binary_image, 'bradley_roth_binary_' + image_name, output_folder)
 
-grayscale_image = to_grayscale(image)
-save_image(grayscale_image, 'grayscale_' + image_name)
+    return image_name, time.perf_counter() - start
 
-binary_image = binarize_image(grayscale_image, threshold=108)
-save_image(binary_image, 'binary_' + image_name)
 
-bernsen_binary_image = bradley_roth_binarization(image, window_size=5)
-save_image(bernsen_binary_image, 'bradley_roth_binary_' + image_name)
\ No newline at end of file
+# Список изображений: папка или шаблон glob
+def collect_images(source):
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths
+                  if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS))
+
+
+# Пакетная обработка на пуле процессов; результаты сохраняются по мере готовности
+def run_batch(source, output_folder=output_folder, workers=None, window_size=None):
+    paths = collect_images(source)
+    os.makedirs(output_folder, exist_ok=True)
+    start = time.perf_counter()
+    processed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_image, path, output_folder, window_size) for path in paths]
+        for future in as_completed(futures):
+            image_name, elapsed = future.result()
+            if elapsed is None:
+                print(f"Не удалось загрузить изображение {image_name}.")
+                continue
+            processed += 1
+            print(f"[{processed}/{len(paths)}] {image_name}: {elapsed:.3f} с")
+
+    print(f"Обработано {processed} изображений за {time.perf_counter() - start:.2f} с")
+
+
+# Изображения по очереди, каждое — по плиткам на пуле из workers потоков
+# (для больших изображений, которые выгоднее делить между ядрами, чем обрабатывать параллельно)
+def run_tiled_batch(source, output_folder=output_folder, workers=None, window_size=None):
+    paths = collect_images(source)
+    os.makedirs(output_folder, exist_ok=True)
+    start = time.perf_counter()
+    processed = 0
+
+    for path in paths:
+        image_name, elapsed = process_image(path, output_folder, window_size, workers or os.cpu_count())
+        if elapsed is None:
+            print(f"Не удалось загрузить изображение {image_name}.")
+            continue
+        processed += 1
+        print(f"[{processed}/{len(paths)}] {image_name}: {elapsed:.3f} с")
+
+    print(f"Обработано {processed} изображений за {time.perf_counter() - start:.2f} с")
+
+
+# Потоковый режим: кадры одного размера (папка, шаблон glob или стек .npy)
+# обрабатываются одним объектом с заранее выделенными буферами.
+# Результаты сохраняются, только если задана output_folder.
+def run_stream_mode(source, output_folder=None, window_size=None):
+    shape, frames = open_frames(source)
+    if window_size is None:
+        window_size = DEFAULT_WINDOW_SIZE
+    processor = BinarizationStream(shape, window_size=window_size, threshold=GLOBAL_THRESHOLD)
+
+    on_result = None
+    if output_folder is not None:
+        os.makedirs(output_folder, exist_ok=True)
+
+        def on_result(index, result):
+            for name, image in result.items():
+                save_image(image, f'{name}_{index:06d}.png', output_folder)
+
+    return run_stream(processor, frames, on_result)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Пакетная бинаризация изображений")
+    parser.add_argument('source', nargs='?', default=input_folder, help="Папка или шаблон glob")
+    parser.add_argument('--output', default=output_folder, help="Папка для результатов")
+    parser.add_argument('--workers', type=int, default=None, help="Число процессов (по умолчанию — все ядра)")
+    parser.add_argument('--window-size', type=int, default=None,
+                        help="Размер окна Брэдли и Рота для всех изображений")
+    parser.add_argument('--tiled', action='store_true',
+                        help="Обрабатывать изображения по очереди, каждое — по плиткам на --workers потоках")
+    parser.add_argument('--stream', action='store_true',
+                        help="Потоковый режим для кадров одного размера (папка или стек .npy)")
+    parser.add_argument('--save', action='store_true', help="Сохранять кадры в потоковом режиме")
+    args = parser.parse_args()
+
+    if args.stream:
+        run_stream_mode(args.source, args.output if args.save else None, args.window_size)
+    elif args.tiled:
+        run_tiled_batch(args.source, args.output, args.workers, args.window_size)
+    else:
+        run_batch(args.source, args.output, args.workers, args.window_size)
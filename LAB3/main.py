@@ -1,43 +1,86 @@
 import cv2
 import numpy as np
 import os
+import sys
+import argparse
+from functools import partial
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.morphology import dilate, element_halo
+from common.tiling import run_tiled
+from common.manifest import Manifest, MANIFEST_NAME
 
 input_folder = 'LAB3/pictures_src'
 output_folder = 'LAB3/pictures_results'
 
 os.makedirs(output_folder, exist_ok=True)
 
-def process_image(image_path, output_folder):
+# Измененный структурирующий элемент (диск/омега-форма)
+KERNEL = np.array([[0, 1, 0],
+                   [1, 1, 1],
+                   [0, 1, 0]], dtype=np.uint8)
+
+THRESH_VALUE = 127
+MAX_VALUE = 255
+
+
+# Пути к результатам обработки изображения
+def output_paths(image_path, output_folder):
+    base_name = os.path.basename(image_path)
+    return {
+        'dilated': os.path.join(output_folder, f"dilated_{base_name}"),
+        'diff': os.path.join(output_folder, f"diff_{base_name}"),
+        'binary': os.path.join(output_folder, f"binary_{base_name}"),
+    }
+
+
+def process_image(image_path, output_folder, workers=None):
     image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
 
     if image is None:
         print(f"Не удалось загрузить изображение {image_path}.")
-        return
-
-    # Измененный структурирующий элемент (диск/омега-форма)
-    kernel = np.array([[0, 1, 0],
-                       [1, 1, 1], 
-                       [0, 1, 0]], dtype=np.uint8)
+        return False
 
-    dilated_image = cv2.dilate(image, kernel, iterations=1)
+    # Дилатация целого изображения или по плиткам на пуле потоков
+    if workers:
+        dilated_image = run_tiled(partial(dilate, element=KERNEL), image, element_halo(KERNEL), workers=workers)
+    else:
+        dilated_image = dilate(image, KERNEL)
     diff_image = cv2.absdiff(image, dilated_image)
 
-    thresh_value = 127
-    max_value = 255
-    _, binary_image = cv2.threshold(image, thresh_value, max_value, cv2.THRESH_BINARY)
+    _, binary_image = cv2.threshold(image, THRESH_VALUE, MAX_VALUE, cv2.THRESH_BINARY)
 
-    base_name = os.path.basename(image_path)
-    filtered_path = os.path.join(output_folder, f"dilated_{base_name}")
-    diff_path = os.path.join(output_folder, f"diff_{base_name}")
-    binary_path = os.path.join(output_folder, f"binary_{base_name}")
+    paths = output_paths(image_path, output_folder)
+    cv2.imwrite(paths['dilated'], dilated_image)
+    cv2.imwrite(paths['diff'], diff_image)
+    cv2.imwrite(paths['binary'], binary_image)
 
-    cv2.imwrite(filtered_path, dilated_image)
-    cv2.imwrite(diff_path, diff_image)
-    cv2.imwrite(binary_path, binary_image)
+    print(f"Изображение {os.path.basename(image_path)} обработано и сохранено в {output_folder}.")
+    return True
 
-    print(f"Изображение {base_name} обработано и сохранено в {output_folder}.")
 
-for image_name in os.listdir(input_folder):
+parser = argparse.ArgumentParser(description="Дилатация, разностное и бинарное изображения")
+parser.add_argument('--force', action='store_true', help="Обработать все изображения заново")
+parser.add_argument('--workers', type=int, default=None,
+                    help="Дилатация по плиткам на заданном числе потоков")
+args = parser.parse_args()
+
+# Инкрементальная обработка: пропускаются изображения, которые не менялись
+# с прошлого запуска и обработаны с теми же параметрами
+manifest = Manifest(os.path.join(output_folder, MANIFEST_NAME),
+                    {'kernel': KERNEL.tolist(), 'threshold': THRESH_VALUE, 'max_value': MAX_VALUE})
+skipped = 0
+
+for image_name in sorted(os.listdir(input_folder)):
     image_path = os.path.join(input_folder, image_name)
-    if os.path.isfile(image_path):
-        process_image(image_path, output_folder)
\ No newline at end of file
+    if not os.path.isfile(image_path):
+        continue
+    outputs = list(output_paths(image_path, output_folder).values())
+    if not args.force and manifest.is_up_to_date(image_path, outputs):
+        skipped += 1
+        continue
+    if process_image(image_path, output_folder, args.workers):
+        manifest.record(image_path, outputs)
+
+manifest.save()
+print(f"Пропущено без изменений: {skipped}.")
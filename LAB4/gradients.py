@@ -0,0 +1,200 @@
+import numpy as np
+import cv2
+import os
+import sys
+from functools import partial
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.bitmap import PackedBitmap
+from common.frames import check_frame_shape
+from common.morphology import dilate_diff, dilate_diff_buffer, element_halo
+from common.tiling import TILE_SIZE, run_tiled
+
+# Функция для перевода изображения в оттенки серого
+def convert_to_grayscale(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+
+# Структурирующий элемент морфологического градиента по умолчанию
+GRADIENT_KERNEL = np.array([[1, 1, 1],
+                            [1, 0, 1],
+                            [1, 1, 1]], dtype=np.uint8)
+
+# Функция для вычисления морфологического градиента
+def morphological_gradient(image, kernel=GRADIENT_KERNEL):
+    # Дилатация и разность с исходным изображением в одном буфере
+    return dilate_diff(image, kernel)
+
+# Функция нормализации изображения к диапазону 0–255
+def normalize_image(image):
+    return cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+# Модифицированная функция бинаризации (инвертированная)
+# packed=True — упакованное побитово изображение (единицы там, где яркость не больше порога)
+def binarize_image(image, threshold=50, packed=False):
+    if packed:
+        return PackedBitmap.from_grayscale(image, threshold, invert=True)
+    _, binary = cv2.threshold(image, threshold, 255, cv2.THRESH_BINARY_INV)
+    return binary
+
+
+# Градиенты Собеля в float64 (эталонный вариант)
+def sobel_gradients_reference(gray_image, ksize=3, threshold=50):
+    Gx = cv2.Sobel(gray_image, cv2.CV_64F, 1, 0, ksize=ksize)
+    Gy = cv2.Sobel(gray_image, cv2.CV_64F, 0, 1, ksize=ksize)
+
+    # Модифицированный итоговый градиент G (сумма модулей)
+    G = np.abs(Gx) + np.abs(Gy)
+
+    G_norm = normalize_image(G)
+    return {
+        'gradient_x': normalize_image(Gx),
+        'gradient_y': normalize_image(Gy),
+        'gradient': G_norm,
+        'binary_gradient': binarize_image(G_norm, threshold),
+    }
+
+
+# Морфологический градиент по плиткам на пуле потоков или процессов
+def morphological_gradient_tiled(image, kernel=GRADIENT_KERNEL, tile_size=TILE_SIZE, workers=None,
+                                 processes=False):
+    return run_tiled(partial(dilate_diff, element=kernel), image, element_halo(kernel),
+                     tile_size=tile_size, workers=workers, processes=processes)
+
+
+def _sobel(image, dx, dy, ddepth, ksize):
+    return cv2.Sobel(image, ddepth, dx, dy, ksize=ksize)
+
+
+# Градиенты Собеля по плиткам с ореолом в радиус ядра; нормализация и бинаризация
+# выполняются по всему изображению. Для ksize=3 производные считаются в int16,
+# иначе в float64; результат совпадает с sobel_gradients_reference.
+def sobel_gradients_tiled(gray_image, ksize=3, threshold=50, tile_size=TILE_SIZE, workers=None,
+                          processes=False):
+    exact = ksize in (1, 3)
+    ddepth = cv2.CV_16S if exact else cv2.CV_64F
+    halo = max(ksize // 2, 1)
+    Gx, Gy = (run_tiled(partial(_sobel, dx=dx, dy=dy, ddepth=ddepth, ksize=ksize), gray_image, halo,
+                        tile_size=tile_size, workers=workers, processes=processes)
+              for dx, dy in ((1, 0), (0, 1)))
+    normalize = _normalize_int16 if exact else normalize_image
+
+    gradient_x, gradient_y = normalize(Gx), normalize(Gy)
+    G = np.abs(Gx, out=Gx)
+    G += np.abs(Gy, out=Gy)
+    G_norm = normalize(G)
+    return {
+        'gradient_x': gradient_x,
+        'gradient_y': gradient_y,
+        'gradient': G_norm,
+        'binary_gradient': binarize_image(G_norm, threshold),
+    }
+
+
+# Таблица min-max нормализации для значений int16 (индексируется через view(np.uint16)).
+# Значения считает сам cv2.normalize на массиве всех целых от min до max: минимум
+# и максимум те же, поэтому те же масштаб, сдвиг и округление, что и в эталонном
+# варианте, а отбрасывание дробной части совпадает с astype(np.uint8).
+def _minmax_lut(smin, smax):
+    values = np.arange(smin, smax + 1, dtype=np.float64)
+    lut = np.zeros(65536, dtype=np.uint8)
+    normalized = cv2.normalize(values, None, 0, 255, cv2.NORM_MINMAX)
+    lut[values.astype(np.int16).view(np.uint16)] = normalized.astype(np.uint8).ravel()
+    return lut
+
+
+# Нормализация int16 к 0–255 по таблице (совпадает с normalize_image)
+def _normalize_int16(image):
+    smin, smax, _, _ = cv2.minMaxLoc(image)
+    return _minmax_lut(smin, smax)[image.view(np.uint16)]
+
+
+# Градиенты Собеля пониженной точности с переиспользуемыми буферами.
+# Для ksize=3 производные считаются в int16 (|Gx| + |Gy| <= 2040), нормализация
+# выполняется одной выборкой из таблицы; для больших ядер — в float32.
+# Возвращаемые массивы — внутренние буферы, они перезаписываются следующим вызовом.
+class SobelPipeline:
+    def __init__(self, ksize=3, threshold=50):
+        self.ksize = ksize
+        self.threshold = threshold
+        self.exact = ksize in (1, 3)
+        self.dtype = np.int16 if self.exact else np.float32
+        self.shape = None
+
+    def _allocate(self, shape):
+        self.shape = shape
+        self.Gx = np.empty(shape, dtype=self.dtype)
+        self.Gy = np.empty(shape, dtype=self.dtype)
+        self.G = np.empty(shape, dtype=self.dtype)
+        self.outputs = {name: np.empty(shape, dtype=np.uint8)
+                        for name in ('gradient_x', 'gradient_y', 'gradient', 'binary_gradient')}
+        if self.exact:
+            # Индексы таблицы нормализации: np.take иначе приводит их к intp в новом массиве,
+            # а с mode='raise' буферизует и выходной массив
+            self.index = np.empty(shape, dtype=np.intp)
+        else:
+            self.scratch = np.empty(shape, dtype=np.float32)
+
+    # Нормализация к 0–255 с записью в буфер uint8
+    def _normalize(self, src, dst):
+        if self.exact:
+            smin, smax, _, _ = cv2.minMaxLoc(src)
+            np.copyto(self.index, src.view(np.uint16))
+            np.take(_minmax_lut(smin, smax), self.index, out=dst, mode='clip')
+        else:
+            cv2.normalize(src, self.scratch, 0, 255, cv2.NORM_MINMAX)
+            np.copyto(dst, self.scratch, casting='unsafe')
+        return dst
+
+    def process(self, gray_image):
+        if gray_image.shape != self.shape:
+            self._allocate(gray_image.shape)
+        ddepth = cv2.CV_16S if self.exact else cv2.CV_32F
+        out = self.outputs
+
+        cv2.Sobel(gray_image, ddepth, 1, 0, dst=self.Gx, ksize=self.ksize)
+        cv2.Sobel(gray_image, ddepth, 0, 1, dst=self.Gy, ksize=self.ksize)
+        self._normalize(self.Gx, out['gradient_x'])
+        self._normalize(self.Gy, out['gradient_y'])
+
+        # G = |Gx| + |Gy|; Gx и Gy больше не нужны, модули считаются на месте
+        np.abs(self.Gx, out=self.Gx)
+        np.abs(self.Gy, out=self.Gy)
+        np.add(self.Gx, self.Gy, out=self.G)
+        self._normalize(self.G, out['gradient'])
+
+        # Бинаризация градиентной матрицы G (инвертированная)
+        cv2.threshold(out['gradient'], self.threshold, 255, cv2.THRESH_BINARY_INV, dst=out['binary_gradient'])
+        return out
+
+
+# Обработчик потока кадров одного размера: полутоновое изображение, градиенты
+# Собеля (SobelPipeline), морфологический градиент и его нормализация.
+# Буферы (в том числе рабочий буфер полос dilate_diff) создаются один раз при
+# настройке на форму кадра; с элементом не больше DIRECT_MAX_SIZE обработка
+# кадра память под изображения не выделяет. Возвращаемые массивы
+# перезаписываются следующим кадром.
+class GradientStream:
+    def __init__(self, shape, ksize=3, threshold=50, kernel=GRADIENT_KERNEL):
+        self.shape = tuple(shape)
+        frame_shape = self.shape[:2]
+        self.kernel = kernel
+        self.sobel = SobelPipeline(ksize, threshold)
+        self.sobel._allocate(frame_shape)
+        self.gray = np.empty(frame_shape, dtype=np.uint8)
+        self.morph_gradient = np.empty(frame_shape, dtype=np.uint8)
+        self.morph_work = dilate_diff_buffer(frame_shape, np.uint8, kernel)
+        self.outputs = dict(self.sobel.outputs, gray=self.gray,
+                            morph_gradient=np.empty(frame_shape, dtype=np.uint8))
+
+    def process(self, frame):
+        check_frame_shape(frame, self.shape)
+        if frame.ndim == 3:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        else:
+            np.copyto(self.gray, frame)
+
+        out = self.outputs
+        self.sobel.process(self.gray)
+        dilate_diff(self.gray, self.kernel, out=self.morph_gradient, work=self.morph_work)
+        cv2.normalize(self.morph_gradient, out['morph_gradient'], 0, 255, cv2.NORM_MINMAX)
+        return out
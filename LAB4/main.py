@@ -1,37 +1,71 @@
-import numpy as np
 import cv2
 import os
+import sys
+import argparse
 
-# Функция для перевода изображения в оттенки серого
-def convert_to_grayscale(image):
-    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.frames import open_frames, run_stream
+from common.manifest import Manifest, MANIFEST_NAME
 
-# Функция для вычисления морфологического градиента
-def morphological_gradient(image):
-    kernel = np.array([[1, 1, 1],
-                       [1, 0, 1],
-                       [1, 1, 1]], dtype=np.uint8)
-    dilated = cv2.dilate(image, kernel, iterations=1)
-    gradient = cv2.absdiff(dilated, image)
-    return gradient
-
-# Функция нормализации изображения к диапазону 0–255
-def normalize_image(image):
-    return cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-
-# Модифицированная функция бинаризации (инвертированная)
-def binarize_image(image, threshold=50):
-    _, binary = cv2.threshold(image, threshold, 255, cv2.THRESH_BINARY_INV)
-    return binary
+from gradients import (GRADIENT_KERNEL, GradientStream, SobelPipeline, convert_to_grayscale, morphological_gradient,
+                       morphological_gradient_tiled, normalize_image, sobel_gradients_reference,
+                       sobel_gradients_tiled)
 
 # Пути к папкам с изображениями
 input_folder = 'LAB4/pictures_src'
 output_folder = 'LAB4/pictures_results'
 os.makedirs(output_folder, exist_ok=True)
 
+SOBEL_KSIZE = 3
+BINARY_THRESHOLD = 50
+
+# Суффиксы результатов обработки
+OUTPUT_SUFFIXES = ('gray', 'gradient_x', 'gradient_y', 'gradient', 'morph_gradient', 'binary_gradient')
+
+def output_paths(image_name):
+    base_name = os.path.splitext(image_name)[0]
+    return {suffix: os.path.join(output_folder, f"{base_name}_{suffix}.png") for suffix in OUTPUT_SUFFIXES}
+
+parser = argparse.ArgumentParser(description="Градиенты Собеля и морфологический градиент")
+parser.add_argument('--force', action='store_true', help="Обработать все изображения заново")
+parser.add_argument('--reference', action='store_true', help="Градиенты Собеля в float64 (эталонный вариант)")
+parser.add_argument('--workers', type=int, default=None,
+                    help="Градиенты по плиткам на заданном числе потоков")
+parser.add_argument('--stream', metavar='SOURCE',
+                    help="Потоковый режим для кадров одного размера (папка, шаблон glob или стек .npy)")
+parser.add_argument('--save', action='store_true', help="Сохранять кадры в потоковом режиме")
+args = parser.parse_args()
+
+# Потоковый режим: кадры обрабатываются одним объектом с заранее выделенными буферами
+if args.stream:
+    shape, frames = open_frames(args.stream)
+    stream = GradientStream(shape, SOBEL_KSIZE, BINARY_THRESHOLD)
+
+    def save_frame(index, result):
+        for suffix in OUTPUT_SUFFIXES:
+            cv2.imwrite(os.path.join(output_folder, f"frame_{index:06d}_{suffix}.png"), result[suffix])
+
+    run_stream(stream, frames, save_frame if args.save else None)
+    sys.exit()
+
+# Конвейер градиентов Собеля в int16 с переиспользуемыми буферами
+sobel_pipeline = SobelPipeline(SOBEL_KSIZE, BINARY_THRESHOLD)
+
+# Инкрементальная обработка: пропускаются изображения, которые не менялись
+# с прошлого запуска и обработаны с теми же параметрами
+manifest = Manifest(os.path.join(output_folder, MANIFEST_NAME),
+                    {'kernel': GRADIENT_KERNEL.tolist(), 'sobel_ksize': SOBEL_KSIZE,
+                     'threshold': BINARY_THRESHOLD})
+skipped = 0
+
 # Обработка всех изображений в папке
-for image_name in os.listdir(input_folder):
+for image_name in sorted(os.listdir(input_folder)):
     image_path = os.path.join(input_folder, image_name)
+    paths = output_paths(image_name)
+    if not args.force and os.path.isfile(image_path) and manifest.is_up_to_date(image_path, paths.values()):
+        skipped += 1
+        continue
+
     image = cv2.imread(image_path)
 
     if image is None:
@@ -41,34 +75,31 @@ for image_name in os.listdir(input_folder):
     # Преобразуем в полутоновое изображение
     gray_image = convert_to_grayscale(image)
 
-    # Вычисление градиентов Gx, Gy с использованием оператора Собеля
-    Gx = cv2.Sobel(gray_image, cv2.CV_64F, 1, 0, ksize=3)
-    Gy = cv2.Sobel(gray_image, cv2.CV_64F, 0, 1, ksize=3)
-
-    # Модифицированный итоговый градиент G (сумма модулей)
-    G = np.abs(Gx) + np.abs(Gy)
+    # Градиенты Собеля, их нормализация и инвертированная бинаризация G = |Gx| + |Gy|
+    if args.reference:
+        sobel = sobel_gradients_reference(gray_image, SOBEL_KSIZE, BINARY_THRESHOLD)
+    elif args.workers:
+        sobel = sobel_gradients_tiled(gray_image, SOBEL_KSIZE, BINARY_THRESHOLD, workers=args.workers)
+    else:
+        sobel = sobel_pipeline.process(gray_image)
 
     # Морфологический градиент
-    morph_gradient = morphological_gradient(gray_image)
-
-    # Нормализация градиентных изображений
-    Gx_norm = normalize_image(Gx)
-    Gy_norm = normalize_image(Gy)
-    G_norm = normalize_image(G)
+    if args.workers:
+        morph_gradient = morphological_gradient_tiled(gray_image, workers=args.workers)
+    else:
+        morph_gradient = morphological_gradient(gray_image)
     morph_gradient_norm = normalize_image(morph_gradient)
 
-    # Бинаризация градиентной матрицы G (инвертированная)
-    binary_G = binarize_image(G_norm, threshold=50)
-
     # Сохранение изображений
-    base_name = os.path.splitext(image_name)[0]
-    cv2.imwrite(os.path.join(output_folder, f"{base_name}_gray.png"), gray_image)
-    cv2.imwrite(os.path.join(output_folder, f"{base_name}_gradient_x.png"), Gx_norm)
-    cv2.imwrite(os.path.join(output_folder, f"{base_name}_gradient_y.png"), Gy_norm)
-    cv2.imwrite(os.path.join(output_folder, f"{base_name}_gradient.png"), G_norm)
-    cv2.imwrite(os.path.join(output_folder, f"{base_name}_morph_gradient.png"), morph_gradient_norm)
-    cv2.imwrite(os.path.join(output_folder, f"{base_name}_binary_gradient.png"), binary_G)
+    cv2.imwrite(paths['gray'], gray_image)
+    cv2.imwrite(paths['gradient_x'], sobel['gradient_x'])
+    cv2.imwrite(paths['gradient_y'], sobel['gradient_y'])
+    cv2.imwrite(paths['gradient'], sobel['gradient'])
+    cv2.imwrite(paths['morph_gradient'], morph_gradient_norm)
+    cv2.imwrite(paths['binary_gradient'], sobel['binary_gradient'])
+    manifest.record(image_path, paths.values())
 
     print(f"Обработано: {image_name}")
 
-print("Все изображения успешно обработаны!")
\ No newline at end of file
+manifest.save()
+print(f"Все изображения успешно обработаны! Пропущено без изменений: {skipped}")
\ No newline at end of file
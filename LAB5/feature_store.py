@@ -0,0 +1,123 @@
+import ast
+import csv
+import os
+import struct
+
+import numpy as np
+
+from features import PROFILE_FEATURES, SCALAR_FEATURES
+
+# Максимальная длина обозначения символа
+LETTER_LENGTH = 8
+
+_MAGIC = b'\x93NUMPY\x01\x00'
+_ALIGN = 64
+
+
+# Тип записи: обозначение символа, скалярные признаки в float64 и профили
+# фиксированной длины (ширина и высота изображения символа)
+def store_dtype(width, height):
+    return np.dtype([('letter', f'U{LETTER_LENGTH}')]
+                    + [(name, np.float64) for name in SCALAR_FEATURES]
+                    + [('profile_x', np.float64, (width,)), ('profile_y', np.float64, (height,))])
+
+
+# Заголовок .npy с запасом под число строк: при добавлении записей заголовок
+# переписывается на месте той же длины, данные не сдвигаются
+def _header(dtype, rows, length=None):
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (rows,)})
+    if length is None:
+        reserved = len(_MAGIC) + 2 + len(header) + 20 + 1
+        length = -(-reserved // _ALIGN) * _ALIGN - len(_MAGIC) - 2
+    return _MAGIC + struct.pack('<H', length) + header.ljust(length - 1).encode('latin1') + b'\n'
+
+
+def _read_header(file):
+    if file.read(len(_MAGIC)) != _MAGIC:
+        raise ValueError("Файл не является хранилищем признаков")
+    length, = struct.unpack('<H', file.read(2))
+    header = ast.literal_eval(file.read(length).decode('latin1'))
+    return np.lib.format.descr_to_dtype(header['descr']), header['shape'][0], length
+
+
+# Хранилище признаков символов: структурированный .npy со столбцами признаков,
+# открываемый через memmap. Записи добавляются в конец файла без перезаписи
+# данных, доступ по символу — через индекс, построенный по столбцу letter.
+class FeatureStore:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.dtype, rows, self._header_length = _read_header(file)
+        self._index = {}
+        self._map(rows)
+        self._index_rows(0)
+
+    # Новое пустое хранилище для изображений символов размера width x height
+    @classmethod
+    def create(cls, path, width, height):
+        with open(path, 'wb') as file:
+            file.write(_header(store_dtype(width, height), 0))
+        return cls(path)
+
+    def _map(self, rows):
+        if rows:
+            self.records = np.lib.format.open_memmap(self.path, mode='r')
+        else:
+            self.records = np.empty(0, dtype=self.dtype)
+
+    # Индекс: символ -> номера строк (при повторах последняя запись — актуальная)
+    def _index_rows(self, start):
+        for row, letter in enumerate(self.records['letter'][start:].tolist(), start):
+            self._index.setdefault(letter, []).append(row)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, letter):
+        return letter in self._index
+
+    @property
+    def letters(self):
+        return list(self._index)
+
+    # Последняя запись для символа
+    def __getitem__(self, letter):
+        return self.records[self._index[letter][-1]]
+
+    # Все записи для символа (например, для нескольких шрифтов)
+    def rows(self, letter):
+        return self.records[self._index.get(letter, [])]
+
+    # Столбец признака для всех записей
+    def column(self, name):
+        return self.records[name]
+
+    # Добавление признаков, вычисленных calculate_features_batch, для символов letters
+    def append(self, letters, features):
+        batch = np.zeros(len(letters), dtype=self.dtype)
+        batch['letter'] = letters
+        for name in SCALAR_FEATURES + PROFILE_FEATURES:
+            batch[name] = features[name]
+
+        start = len(self.records)
+        rows = start + len(batch)
+        self.records = None
+        with open(self.path, 'r+b') as file:
+            file.seek(0, os.SEEK_END)
+            file.write(batch.tobytes())
+            file.seek(0)
+            file.write(_header(self.dtype, rows, self._header_length))
+        self._map(rows)
+        self._index_rows(start)
+
+    # Экспорт в CSV прежнего формата (разделитель ';', профили — строки через ';')
+    def to_csv(self, csv_path):
+        with open(csv_path, mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file, delimiter=';')
+            writer.writerow(['letter', *SCALAR_FEATURES, *PROFILE_FEATURES])
+            for record in self.records:
+                writer.writerow([
+                    record['letter'],
+                    *(record[name] for name in SCALAR_FEATURES),
+                    *(';'.join(map(str, record[name])) for name in PROFILE_FEATURES),
+                ])
@@ -0,0 +1,106 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+# Скалярные признаки в порядке столбцов features.csv
+SCALAR_FEATURES = (
+    'weight_I', 'relative_weight_I', 'weight_II', 'relative_weight_II',
+    'weight_III', 'relative_weight_III', 'weight_IV', 'relative_weight_IV',
+    'total_weight', 'relative_total_weight', 'center_y', 'center_x',
+    'relative_center_y', 'relative_center_x', 'inertia_y', 'inertia_x',
+    'relative_inertia_y', 'relative_inertia_x',
+)
+PROFILE_FEATURES = ('profile_x', 'profile_y')
+
+
+# Загрузка изображений символов одного размера в массив (N, высота, ширина).
+# Возвращает символы, для которых нашлись файлы, и массив изображений.
+def load_glyph_stack(folder, symbols):
+    found, images = [], []
+    for symbol in symbols:
+        image_path = os.path.join(folder, f'{symbol}.png')
+        if not os.path.exists(image_path):
+            print(f"Файл {image_path} не найден, пропуск...")
+            continue
+        found.append(symbol)
+        images.append(np.array(Image.open(image_path).convert('L')))
+
+    shapes = {image.shape for image in images}
+    if len(shapes) > 1:
+        raise ValueError(f"Изображения символов разного размера: {sorted(shapes)}")
+    return found, np.stack(images) if images else np.empty((0, 0, 0), dtype=np.uint8)
+
+
+# Признаки всех символов массива (N, высота, ширина) сразу.
+# Все признаки выражаются через профили: веса четвертей — через профиль X верхней
+# половины, центры тяжести и моменты инерции — через произведения профилей на
+# координаты и их квадраты (сетка координат строится один раз). Суммы яркостей
+# считаются в целых числах. Возвращает словарь массивов (N,) и профилей (N, ширина),
+# (N, высота).
+def calculate_features_batch(stack):
+    count, height, width = stack.shape
+    total_pixels = height * width
+    mid_x, mid_y = width // 2, height // 2
+
+    # Профили X и Y в целых суммах яркостей
+    profile_x = stack.sum(axis=1, dtype=np.int64)
+    profile_y = stack.sum(axis=2, dtype=np.int64)
+    upper_x = stack[:, :mid_y].sum(axis=1, dtype=np.int64)
+    lower_x = profile_x - upper_x
+
+    # Вес и относительный вес для каждой четверти
+    weight_I = upper_x[:, :mid_x].sum(axis=1) / 255
+    weight_II = upper_x[:, mid_x:].sum(axis=1) / 255
+    weight_III = lower_x[:, :mid_x].sum(axis=1) / 255
+    weight_IV = lower_x[:, mid_x:].sum(axis=1) / 255
+    quarter_pixels = total_pixels / 4
+
+    # Общий вес и относительный вес
+    total_weight = weight_I + weight_II + weight_III + weight_IV
+
+    # Моменты нулевого, первого и второго порядка по координатам
+    x = np.arange(width, dtype=np.int64)
+    y = np.arange(height, dtype=np.int64)
+    mass = profile_x.sum(axis=1)
+    moment_x, moment_xx = profile_x @ x, profile_x @ (x * x)
+    moment_y, moment_yy = profile_y @ y, profile_y @ (y * y)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Центр тяжести
+        mass_weight = mass / 255
+        center_y = moment_y / mass_weight / 255
+        center_x = moment_x / mass_weight / 255
+
+        # Моменты инерции: сумма (x - center_x)^2 * яркость, раскрытая через моменты
+        inertia_y = (moment_xx - 2 * center_x * moment_x + center_x * center_x * mass) / 255
+        inertia_x = (moment_yy - 2 * center_y * moment_y + center_y * center_y * mass) / 255
+
+    return {
+        'weight_I': weight_I,
+        'relative_weight_I': weight_I / quarter_pixels,
+        'weight_II': weight_II,
+        'relative_weight_II': weight_II / quarter_pixels,
+        'weight_III': weight_III,
+        'relative_weight_III': weight_III / quarter_pixels,
+        'weight_IV': weight_IV,
+        'relative_weight_IV': weight_IV / quarter_pixels,
+        'total_weight': total_weight,
+        'relative_total_weight': total_weight / total_pixels,
+        'center_y': center_y,
+        'center_x': center_x,
+        'relative_center_y': center_y / height,
+        'relative_center_x': center_x / width,
+        'inertia_y': inertia_y,
+        'inertia_x': inertia_x,
+        'relative_inertia_y': inertia_y / (total_pixels * width ** 2),
+        'relative_inertia_x': inertia_x / (total_pixels * height ** 2),
+        'profile_x': profile_x / 255,
+        'profile_y': profile_y / 255,
+    }
+
+
+# Признаки одного изображения
+def calculate_features(image_array):
+    features = calculate_features_batch(image_array[np.newaxis])
+    return {name: values[0] for name, values in features.items()}
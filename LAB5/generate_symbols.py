@@ -1,28 +1,17 @@
-from PIL import Image, ImageDraw, ImageFont
 import os
+import sys
 
-# Создание папки для хранения изображений
-output_folder = "LAB5/generated_images_letters"
-if not os.path.exists(output_folder):
-    os.makedirs(output_folder)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.glyphs import ATLAS_NAME, GlyphAtlas
 
-# Грузинский алфавит (вариант 16)
-letters = "აბგდევზთიკლმნოპჟრსტუფქღყშჩცძწჭხჯჰ"
+from pipeline import ALPHABET, letters_path, render_symbols, save_symbols
 
-font = ImageFont.truetype("DejaVuSans.ttf", 52)  # Проверьте наличие в системе
+# Кэш шрифта и отрисованных букв; сохраняется между запусками
+atlas = GlyphAtlas(os.path.join(letters_path, ATLAS_NAME))
 
-for letter in letters:
-    img = Image.new('L', (80, 80), color=255)  # Белый фон
-    draw = ImageDraw.Draw(img)
+# Отрисовка всех букв в массив и сохранение изображений
+letters = list(ALPHABET)
+save_symbols(letters, render_symbols(letters, atlas), letters_path)
 
-    # Определение размеров текста
-    text_width, text_height = draw.textbbox((0, 0), letter, font=font)[2:4]
-    position = ((100 - text_width) // 2.5, (100 - text_height) // 7)
-
-    # Отрисовка символа
-    draw.text(position, letter, fill=0, font=font)
-
-    # Сохранение изображения
-    img.save(f"{output_folder}/{letter}.png")
-
-print("Генерация изображений завершена!")
\ No newline at end of file
+atlas.save()
+print("Генерация изображений завершена!")
@@ -0,0 +1,104 @@
+import os
+import sys
+import argparse
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.glyphs import ATLAS_NAME, GlyphAtlas, paste_glyph
+from common.plots import BACKENDS, save_bars
+
+from features import calculate_features_batch
+from feature_store import FeatureStore
+
+# Грузинский алфавит (вариант 16)
+ALPHABET = 'აბგდევზთიკლმნოპჟრსტუფქღყშჩცძწჭხჯჰ'
+
+FONT_PATH = "DejaVuSans.ttf"
+FONT_SIZE = 52
+IMAGE_SIZE = 80
+
+letters_path = 'LAB5/generated_images_letters'
+inverse_path = 'LAB5/generated_images_inverse_letters'
+profiles_path = 'LAB5/profiles'
+store_path = 'LAB5/features.npy'
+output_csv_path = 'LAB5/features.csv'
+
+
+# Отрисовка букв черным на белом фоне в массив (N, size, size)
+def render_symbols(letters, atlas, font_path=FONT_PATH, font_size=FONT_SIZE, size=IMAGE_SIZE):
+    stack = np.full((len(letters), size, size), 255, dtype=np.uint8)
+    for image, letter in zip(stack, letters):
+        # Положение символа по размерам его рамки
+        text_width, text_height = atlas.text_bbox(letter, font_path, font_size)[2:4]
+        position = ((100 - text_width) // 2.5, (100 - text_height) // 7)
+        paste_glyph(image, atlas.glyph(letter, font_path, font_size), int(position[0]), int(position[1]))
+    return stack
+
+
+# Инверсия всех изображений одной операцией (out=stack — на месте)
+def invert_symbols(stack, out=None):
+    return np.subtract(255, stack, out=out, dtype=np.uint8)
+
+
+def save_symbols(letters, stack, folder):
+    os.makedirs(folder, exist_ok=True)
+    for letter, image in zip(letters, stack):
+        Image.fromarray(image).save(os.path.join(folder, f'{letter}.png'))
+
+
+# Функция для сохранения профилей в виде изображений
+# (backend='matplotlib' — графики с подписями осей)
+def save_profile_image(profile, path, orientation='horizontal', backend='fast'):
+    if orientation == 'horizontal':
+        save_bars(profile, path, backend=backend, title='Profile', xlabel='X', ylabel='Weight')
+    else:
+        save_bars(profile, path, vertical=True, backend=backend, title='Profile', xlabel='Weight', ylabel='Y')
+
+
+def save_profiles(letters, features, folder, backend='fast'):
+    os.makedirs(folder, exist_ok=True)
+    for index, letter in enumerate(letters):
+        save_profile_image(features['profile_x'][index], os.path.join(folder, f'{letter}_profile_x.png'),
+                           'horizontal', backend)
+        save_profile_image(features['profile_y'][index], os.path.join(folder, f'{letter}_profile_y.png'),
+                           'vertical', backend)
+
+
+# Полный цикл в памяти: отрисовка -> инверсия -> признаки -> хранилище.
+# Промежуточные изображения записываются только при save_images=True.
+def run_pipeline(letters=ALPHABET, path=store_path, save_images=False, atlas=None):
+    atlas = atlas or GlyphAtlas(os.path.join(letters_path, ATLAS_NAME))
+    letters = list(letters)
+
+    stack = render_symbols(letters, atlas)
+    if save_images:
+        save_symbols(letters, stack, letters_path)
+    invert_symbols(stack, out=stack)
+    if save_images:
+        save_symbols(letters, stack, inverse_path)
+
+    features = calculate_features_batch(stack)
+    store = FeatureStore.create(path, stack.shape[2], stack.shape[1])
+    store.append(letters, features)
+    atlas.save()
+    return store, features
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Признаки символов алфавита без промежуточных файлов")
+    parser.add_argument('--save-images', action='store_true',
+                        help=f"Сохранить изображения букв в {letters_path} и {inverse_path}")
+    parser.add_argument('--profiles', action='store_true', help=f"Сохранить профили в {profiles_path}")
+    parser.add_argument('--backend', choices=BACKENDS, default='fast', help="Способ отрисовки профилей")
+    parser.add_argument('--csv', action='store_true', help=f"Дополнительно экспортировать признаки в {output_csv_path}")
+    args = parser.parse_args()
+
+    store, features = run_pipeline(save_images=args.save_images)
+    if args.profiles:
+        save_profiles(store.letters, features, profiles_path, args.backend)
+    if args.csv:
+        store.to_csv(output_csv_path)
+
+    print(f"Обработка завершена. Признаки {len(store)} символов сохранены в {store_path}.")
@@ -1,6 +1,11 @@
+import os
+import sys
 from math import ceil
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.glyphs import ATLAS_NAME, GlyphAtlas, paste_glyph
 
 def semitone(old_image):
     return (0.3 * old_image[:, :, 0] + 0.59 * old_image[:, :, 1] + 0.11 * old_image[:, :, 2]).astype(np.uint8)
@@ -19,33 +24,42 @@ def simple_binarization(old_image, threshold, semitone_needed=True):
 
 SENTENCE = "მთვარე დღეს ისეთი ლამაზია"
 
+FONT_PATH = "DejaVuSans.ttf"
+FONT_SIZE = 52
+OUTPUT_DIR = "LAB6/out/georgian_letters"
+
 if __name__ == '__main__':
+    # Create output directory if it doesn't exist
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    # Font and rendered letters are cached in the atlas between runs
+    atlas = GlyphAtlas(os.path.join(OUTPUT_DIR, ATLAS_NAME))
+
     # Load font - make sure DejaVuSans.ttf is available in your system
+    font_path = FONT_PATH
     try:
-        font = ImageFont.truetype("DejaVuSans.ttf", 52)
+        font = atlas.font(font_path, FONT_SIZE)
     except IOError:
         # Fallback to default font if DejaVu is not available
-        font = ImageFont.load_default()
+        font_path = None
+        font = atlas.font(font_path, FONT_SIZE)
         print("Warning: DejaVuSans.ttf not found, using default font")
 
-    # Create output directory if it doesn't exist
-    import os
-    os.makedirs("LAB6/out/georgian_letters", exist_ok=True)
-
     # Generate image for each letter
     for letter in SENTENCE:
         # Calculate image width with some padding
         width = font.getlength(letter) + 20
-        
+
         # Create blank white image
-        img = Image.new(mode="RGB", size=(ceil(width), 60), color="white")
-        draw = ImageDraw.Draw(img)
-        
+        img = np.full((60, ceil(width)), 255, dtype=np.uint8)
+
         # Draw the letter (centered vertically)
-        draw.text((10, 2), letter, (0, 0, 0), font=font)
-        
+        paste_glyph(img, atlas.glyph(letter, font_path, FONT_SIZE), 10, 2)
+
         # Binarize and save
-        binarized = Image.fromarray(simple_binarization(np.array(img), 120), 'L')
-        binarized.save(f"LAB6/out/georgian_letters/{letter}.png")
+        rgb = np.repeat(img[:, :, np.newaxis], 3, axis=2)
+        binarized = Image.fromarray(simple_binarization(rgb, 120), 'L')
+        binarized.save(os.path.join(OUTPUT_DIR, f"{letter}.png"))
 
-    print(f"Generated {len(SENTENCE)} Georgian letter images")
\ No newline at end of file
+    atlas.save()
+    print(f"Generated {len(SENTENCE)} Georgian letter images")
@@ -0,0 +1,211 @@
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.bitmap import PackedBitmap
+from common.deskew import deskew, estimate_skew
+
+
+# Профиль X строки (массив 0/1 или PackedBitmap)
+def column_profile(line):
+    if isinstance(line, PackedBitmap):
+        return line.profile_x()
+    return np.asarray(line).sum(axis=0)
+
+
+# Профили X всех строк пакета, записанные подряд в один массив ненулевых столбцов.
+# После каждой строки добавляется пустой столбец, чтобы отрезки соседних строк
+# не сливались. Возвращает маску и начало каждой строки в общем массиве.
+def _concatenated_mask(lines):
+    if isinstance(lines, np.ndarray) and lines.ndim == 3:
+        count, _, width = lines.shape
+        mask = np.zeros((count, width + 1), dtype=np.int8)
+        np.not_equal(lines.sum(axis=1), 0, out=mask[:, :width], casting='unsafe')
+        return mask.ravel(), np.arange(count) * (width + 1), np.full(count, width)
+
+    profiles = [column_profile(line) for line in lines]
+    widths = np.array([len(profile) for profile in profiles], dtype=np.int64)
+    offsets = np.cumsum(widths + 1) - (widths + 1)
+    mask = np.zeros(int((widths + 1).sum()), dtype=np.int8)
+    if profiles:
+        mask[np.concatenate([offset + np.flatnonzero(profile) for offset, profile in zip(offsets, profiles)])] = 1
+    return mask, offsets, widths
+
+
+# Границы символов для пакета строк: массив (N, высота, ширина) или список
+# изображений строк (массивы 0/1 или PackedBitmap) разной ширины.
+# Результат — массив (M, 3) со строками (номер строки, x1, x2), x2 не включается.
+#
+# Правило то же, что в get_symbol_boxes: символ начинается с непустого столбца
+# и продолжается до первого пустого столбца, стоящего не ближе min_symbol_width
+# от начала; символ, не уместившийся до края строки, отбрасывается.
+# Отрезки непустых столбцов находятся одним np.diff; для каждого отрезка сразу
+# вычисляются конец символа и следующий отрезок после него, поэтому цикл идет
+# только по номеру символа в строке, одновременно для всех строк.
+def symbol_boxes_batch(lines, min_symbol_width=5):
+    mask, offsets, widths = _concatenated_mask(lines)
+    edges = np.diff(mask, prepend=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return np.empty((0, 3), dtype=np.int64)
+
+    line_ends = offsets + widths
+    run_lines = np.searchsorted(offsets, starts, side='right') - 1
+
+    # Символ, начатый с отрезка k, поглощает все отрезки, начавшиеся не дальше
+    # starts[k] + min_symbol_width, и заканчивается концом последнего из них
+    limits = starts + max(min_symbol_width, 0)
+    valid = limits <= line_ends[run_lines]
+    following = np.searchsorted(starts, limits, side='right')
+    box_ends = np.maximum(ends[following - 1], limits)
+    # После символа, не уместившегося в строку, переходим к следующей строке
+    following = np.where(valid, following, np.searchsorted(starts, line_ends[run_lines], side='right'))
+
+    runs = np.arange(len(starts))
+    if (following[valid] == runs[valid] + 1).all():
+        # Слияний нет: каждый допустимый отрезок — отдельный символ
+        chosen = runs[valid]
+    else:
+        first = np.searchsorted(starts, offsets)
+        stop = np.searchsorted(starts, line_ends)
+        current = first[first < stop]
+        stop = stop[first < stop]
+        visited = []
+        while len(current):
+            visited.append(current)
+            current = following[current]
+            keep = current < stop
+            current, stop = current[keep], stop[keep]
+        chosen = np.sort(np.concatenate(visited))
+        chosen = chosen[valid[chosen]]
+
+    line_numbers = run_lines[chosen]
+    return np.stack([line_numbers, starts[chosen] - offsets[line_numbers],
+                     box_ends[chosen] - offsets[line_numbers]], axis=1).astype(np.int64)
+
+
+# Границы символов одной строки списком пар (x1, x2)
+def symbol_boxes(line, min_symbol_width=5):
+    return [(x1, x2) for _, x1, x2 in symbol_boxes_batch([line], min_symbol_width).tolist()]
+
+
+# Разметка страницы: рамки (y1, y2, x1, x2) строк, слов и символов
+# (x2, y2 не включаются) и номера родителей — строки слова и слова символа
+PageLayout = namedtuple('PageLayout', ['lines', 'words', 'symbols', 'word_lines', 'symbol_words'])
+
+
+# Порог промежутка между словами по статистике промежутков между символами:
+# промежутков внутри слов больше, поэтому медиана — типичный промежуток между
+# буквами, а промежутки больше медианы в ratio раз разделяют слова.
+# При малом числе промежутков (меньше min_gaps) медиана ненадежна — например,
+# для [2, 23] она попадает между классами. Тогда промежутки делятся на два
+# класса по наибольшему относительному скачку в отсортированном ряду (если он
+# не меньше ratio), порог — середина скачка.
+def word_gap_threshold(gaps, ratio=2.5, min_gaps=8):
+    gaps = np.sort(np.asarray(gaps))
+    if len(gaps) == 0:
+        return np.inf
+    if 1 < len(gaps) < min_gaps:
+        jumps = gaps[1:] / np.maximum(gaps[:-1], 1)
+        k = int(np.argmax(jumps))
+        if jumps[k] >= ratio:
+            return (gaps[k] + gaps[k + 1]) / 2
+    return ratio * max(np.median(gaps), 1.0)
+
+
+# Разбиение страницы (массив 0/1, 1 — символ) на строки по профилю Y, строк —
+# на символы по профилям X (symbol_boxes_batch для всех строк сразу), символов —
+# на слова по промежуткам между соседними символами строки.
+# min_line_height — наименьшая высота строки (по тому же правилу слияния, что
+# и min_symbol_width: к строке присоединяются диакритические знаки над ней),
+# word_gap — порог промежутка между словами (None — по статистике промежутков).
+def segment_page(page, min_line_height=1, min_symbol_width=1, word_gap=None):
+    page = np.asarray(page)
+
+    # Строки: отрезки ненулевых строк профиля Y (те же отрезки по профилю X транспонированной страницы)
+    line_runs = symbol_boxes_batch([page.T], min_line_height)
+    line_y = line_runs[:, 1:]
+
+    # Символы всех строк за один проход
+    symbol_runs = symbol_boxes_batch([page[y1:y2] for y1, y2 in line_y], min_symbol_width)
+    symbol_lines = symbol_runs[:, 0]
+    symbols = np.column_stack([line_y[symbol_lines], symbol_runs[:, 1:]])
+
+    # Слова: новое слово начинается с первого символа строки или после промежутка больше порога
+    gaps = symbols[1:, 2] - symbols[:-1, 3]
+    same_line = symbol_lines[1:] == symbol_lines[:-1]
+    if word_gap is None:
+        word_gap = word_gap_threshold(gaps[same_line])
+    starts_word = np.r_[True, ~same_line | (gaps > word_gap)] if len(symbols) else np.zeros(0, dtype=bool)
+    symbol_words = np.cumsum(starts_word) - 1
+    word_starts = np.flatnonzero(starts_word)
+    word_ends = np.flatnonzero(np.r_[starts_word[1:], True][:len(starts_word)])
+    word_lines = symbol_lines[word_starts]
+    words = np.column_stack([line_y[word_lines], symbols[word_starts, 2], symbols[word_ends, 3]])
+
+    # Горизонтальные границы строки — от первого до последнего символа
+    lines = np.zeros((len(line_y), 4), dtype=np.int64)
+    lines[:, :2] = line_y
+    if len(words):
+        line_firsts = np.flatnonzero(np.r_[True, word_lines[1:] != word_lines[:-1]])
+        line_lasts = np.r_[line_firsts[1:], len(words)] - 1
+        lines[word_lines[line_firsts], 2] = words[line_firsts, 2]
+        lines[word_lines[line_firsts], 3] = words[line_lasts, 3]
+
+    return PageLayout(lines, words.astype(np.int64), symbols.astype(np.int64), word_lines, symbol_words)
+
+
+# Фрагменты изображения по рамкам — срезы без копирования
+def crop_views(image, boxes):
+    return [image[y1:y2, x1:x2] for y1, y2, x1, x2 in boxes.tolist()]
+
+
+# Иерархия строк, слов и символов: словари с рамкой box и срезом image
+# изображения image (например, исходной полутоновой страницы)
+def page_tree(layout, image):
+    symbols = [{'box': box, 'image': view}
+               for box, view in zip(layout.symbols.tolist(), crop_views(image, layout.symbols))]
+    words = [{'box': box, 'image': view, 'symbols': []}
+             for box, view in zip(layout.words.tolist(), crop_views(image, layout.words))]
+    lines = [{'box': box, 'image': view, 'words': []}
+             for box, view in zip(layout.lines.tolist(), crop_views(image, layout.lines))]
+    for symbol, word in zip(symbols, layout.symbol_words.tolist()):
+        words[word]['symbols'].append(symbol)
+    for word, line in zip(words, layout.word_lines.tolist()):
+        lines[line]['words'].append(word)
+    return lines
+
+
+if __name__ == '__main__':
+    import argparse
+    from PIL import Image
+    from PIL.ImageOps import invert
+
+    parser = argparse.ArgumentParser(description="Разбиение страницы на строки, слова и символы")
+    parser.add_argument('page', nargs='?', default='LAB6/out/sentence/1.png', help="Изображение страницы")
+    parser.add_argument('--output', default='LAB6/pictures_results/page', help="Папка для символов")
+    parser.add_argument('--min-line-height', type=int, default=1)
+    parser.add_argument('--min-symbol-width', type=int, default=1)
+    parser.add_argument('--deskew', action='store_true', help="Исправить наклон строк перед сегментацией")
+    args = parser.parse_args()
+
+    page = np.array(Image.open(args.page).convert('L'))
+    if args.deskew:
+        angle = estimate_skew(page == 0)
+        page, _ = deskew(page, angle, fill=255)
+        print(f"Наклон: {angle:.2f}°")
+    layout = segment_page(page == 0, args.min_line_height, args.min_symbol_width)
+
+    # Символы сохраняются с именами строка_слово_символ
+    os.makedirs(args.output, exist_ok=True)
+    for line_number, line in enumerate(page_tree(layout, page), 1):
+        for word_number, word in enumerate(line['words'], 1):
+            for symbol_number, symbol in enumerate(word['symbols'], 1):
+                invert(Image.fromarray(symbol['image'])).save(
+                    os.path.join(args.output, f"{line_number}_{word_number}_{symbol_number}.png"))
+
+    print(f"Строк: {len(layout.lines)}, слов: {len(layout.words)}, символов: {len(layout.symbols)}")
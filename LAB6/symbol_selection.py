@@ -1,28 +1,12 @@
-from text_selection import calculate_profiles
+from segmentation import symbol_boxes
 from PIL import Image
 from PIL.ImageOps import invert
 import numpy as np
 
 
+# Границы символов — отрезки непустых столбцов профиля X
 def get_symbol_boxes(img):
-    profiles = calculate_profiles(img)
-    borders = []
-
-    i = 0
-    while i < profiles['x'].shape[0]:
-        current = profiles['x'][i]
-        if current != 0:
-            x1, x2 = None, None
-            x1 = i
-            count = 0
-            while profiles['x'][i + count] != 0:
-                count += 1
-            i += count
-            x2 = i
-            borders.append((x1, x2))
-        i += 1
-
-    return borders
+    return symbol_boxes(img, min_symbol_width=1)
 
 
 if __name__ == '__main__':
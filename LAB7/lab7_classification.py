@@ -1,9 +1,18 @@
 import os
+import sys
+import json
+import hashlib
+import argparse
+import tempfile
+from collections import namedtuple
 from pathlib import Path
 import numpy as np
 from PIL import Image, ImageDraw
-import cv2
-from sklearn.preprocessing import StandardScaler
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.bitmap import PackedBitmap
+from common.components import connected_components
+from common.deskew import deskew
 
 # Параметры
 ALPHABET = list("აბგდევზთიკლმნოპჟრსტუფქღყშჩცძწჭხჯჰ")
@@ -11,37 +20,98 @@ PHRASE_GT = "მთვარე დღეს ისეთი ლამაზი
 SIZE = (64, 64)
 
 ALPHABET_DIR = Path("alphabet")
+# Скомпилированный индекс шаблонов и версия признаков (меняется вместе с extract_features_batch)
+TEMPLATE_INDEX = ALPHABET_DIR / ".template_index.npy"
+FEATURES_VERSION = 1
 SRC_PATH = Path("pictures_src/phrase1.bmp")
 DST_DIR = Path("pictures_results")
 os.makedirs(DST_DIR, exist_ok=True)
 
-def to_binary(img_or_path) -> np.ndarray:
+def to_binary(img_or_path, packed: bool = False) -> np.ndarray | PackedBitmap:
     img = Image.open(img_or_path).convert("L")
+    if packed:
+        return PackedBitmap.from_grayscale(np.array(img), 127, invert=True)
     return (np.array(img) < 128).astype(np.uint8)
 
+# Рамки (x0, y0, x1, y1) краски внутри рамок boxes (включительно) для всех
+# рамок сразу: числа единиц в строках и столбцах рамок берутся из накопленных
+# сумм изображения по X и по Y. Для пустых рамок ширина и высота нулевые.
+def _ink_boxes(bin_img: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    x0, y0, x1, y1 = boxes.T
+    sum_x = np.zeros((bin_img.shape[0], bin_img.shape[1] + 1), dtype=np.int64)
+    np.cumsum(bin_img, axis=1, out=sum_x[:, 1:])
+    sum_y = np.zeros((bin_img.shape[0] + 1, bin_img.shape[1]), dtype=np.int64)
+    np.cumsum(bin_img, axis=0, out=sum_y[1:])
+
+    def ink_range(starts, stops, counts):
+        lengths = stops - starts + 1
+        owner = np.repeat(np.arange(len(starts)), lengths)
+        position = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        filled = counts(position, owner) > 0
+        first = np.full(len(starts), np.iinfo(np.int64).max)
+        last = np.full(len(starts), -1)
+        np.minimum.at(first, owner[filled], position[filled])
+        np.maximum.at(last, owner[filled], position[filled])
+        return first, last
+
+    ink_y0, ink_y1 = ink_range(y0, y1, lambda y, box: sum_x[y, x1[box] + 1] - sum_x[y, x0[box]])
+    ink_x0, ink_x1 = ink_range(x0, x1, lambda x, box: sum_y[y1[box] + 1, x] - sum_y[y0[box], x])
+    return np.stack([ink_x0, ink_y0, ink_x1, ink_y1], axis=1)
+
+
+# Нормализация всех символов в массив (N, size): обрезка по краске, дополнение
+# до квадрата и изменение размера ближайшим соседом (как Image.resize NEAREST) —
+# одной выборкой по картам индексов строк и столбцов всех символов.
+# Как и прежде, символ в результате — нули, фон — единицы; пустая рамка — нули.
+def normalize_batch(bin_img: np.ndarray, boxes, size: tuple[int, int] = SIZE) -> np.ndarray:
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    ink = _ink_boxes(bin_img, boxes)
+    empty = ink[:, 2] < 0
+    ink[empty] = 0
+    x0, y0, x1, y1 = ink.T
+    height, width = y1 - y0 + 1, x1 - x0 + 1
+    side = np.maximum(height, width)
+
+    # Карты индексов: пиксель результата -> пиксель квадрата -> пиксель изображения.
+    # Координаты квадрата считаются как в PIL (ImagingScaleAffine): начальная
+    # точка scale / 2 и последовательное прибавление scale в double, затем
+    # отбрасывание дробной части; cumsum складывает так же последовательно,
+    # поэтому совпадение с Image.resize NEAREST точное для любого size.
+    def index_map(count, start, length):
+        steps = np.repeat(side[:, np.newaxis] / count, count, axis=1)
+        steps[:, 0] *= 0.5
+        square = np.cumsum(steps, axis=1).astype(np.int64)
+        inside = (square >= ((side - length) // 2)[:, np.newaxis]) & \
+                 (square < ((side - length) // 2 + length)[:, np.newaxis])
+        return start[:, np.newaxis] + square - ((side - length) // 2)[:, np.newaxis], inside
+
+    rows, rows_inside = index_map(size[1], y0, height)
+    columns, columns_inside = index_map(size[0], x0, width)
+    np.clip(rows, 0, bin_img.shape[0] - 1, out=rows)
+    np.clip(columns, 0, bin_img.shape[1] - 1, out=columns)
+
+    glyphs = bin_img[rows[:, :, np.newaxis], columns[:, np.newaxis, :]] != 0
+    glyphs &= rows_inside[:, :, np.newaxis] & columns_inside[:, np.newaxis, :]
+    result = (~glyphs).view(np.uint8)
+    result[empty] = 0
+    return result
+
+
 def normalize_bin(arr: np.ndarray, size: tuple[int, int] = SIZE) -> np.ndarray:
-    ys, xs = np.nonzero(arr)
-    if ys.size == 0:
-        return np.zeros(size, dtype=np.uint8)
-    y0, y1 = ys.min(), ys.max()
-    x0, x1 = xs.min(), xs.max()
-    crop = arr[y0:y1+1, x0:x1+1]
-
-    h, w = crop.shape
-    side = max(h, w)
-    canvas = np.zeros((side, side), dtype=np.uint8)
-    y_off = (side - h) // 2
-    x_off = (side - w) // 2
-    canvas[y_off:y_off + h, x_off:x_off + w] = crop
-
-    img = Image.fromarray(canvas * 255)
-    img = img.resize(size, Image.Resampling.NEAREST)
-    return (np.array(img) < 128).astype(np.uint8)
+    return normalize_batch(arr, [(0, 0, arr.shape[1] - 1, arr.shape[0] - 1)], size)[0]
+
 
+def _profile_x(bin_img):
+    return bin_img.profile_x() if isinstance(bin_img, PackedBitmap) else bin_img.sum(axis=0)
 
-def segment_by_profiles(bin_img: np.ndarray, empty_thresh: int = 1):
+
+def _profile_y(bin_img):
+    return bin_img.profile_y() if isinstance(bin_img, PackedBitmap) else bin_img.sum(axis=1)
+
+
+def segment_by_profiles(bin_img: np.ndarray | PackedBitmap, empty_thresh: int = 1):
     h, w = bin_img.shape
-    vert = bin_img.sum(axis=0)
+    vert = _profile_x(bin_img)
     splits, in_char = [], False
 
     for x, v in enumerate(vert):
@@ -56,72 +126,210 @@ def segment_by_profiles(bin_img: np.ndarray, empty_thresh: int = 1):
     boxes = []
     for x0, x1 in splits:
         slice_ = bin_img[:, x0:x1+1]
-        horiz = slice_.sum(axis=1)
+        horiz = _profile_y(slice_)
         ys = np.where(horiz > empty_thresh)[0]
         if ys.size:
             boxes.append((x0, ys[0], x1, ys[-1]))
     return boxes
 
 
-def extract_features(arr: np.ndarray) -> np.ndarray:
-    ys, xs = np.nonzero(arr)
-    if ys.size == 0:
-        return np.zeros(10)
+# Сегментация по связным компонентам: касающиеся по X символы не сливаются,
+# части одного символа объединяются по перекрытию проекций и расстоянию
+def segment_by_components(bin_img: np.ndarray | PackedBitmap, min_overlap: float = 0.5, max_distance: int = 1):
+    if isinstance(bin_img, PackedBitmap):
+        bin_img = bin_img.to_array()
+    components = connected_components(bin_img, merge=True, min_overlap=min_overlap,
+                                      max_distance=max_distance, masks=False)
+    return [(x0, y0, x1 - 1, y1 - 1) for y0, y1, x0, x1 in components.boxes.tolist()]
+
+
+SEGMENTERS = {'profiles': segment_by_profiles, 'components': segment_by_components}
+
+
+# Моменты всех изображений массива (N, высота, ширина) до третьего порядка:
+# сырые m[p, q] = сумма x^p y^q I(y, x) двумя матричными умножениями на степени
+# координат, центральные mu — через сырые, инварианты Ху — через
+# нормированные центральные моменты (как cv2.HuMoments по моментам изображения).
+def image_moments(stack: np.ndarray) -> dict:
+    count, height, width = stack.shape
+    powers_x = np.arange(width, dtype=np.float64)[:, np.newaxis] ** np.arange(4)
+    powers_y = np.arange(height, dtype=np.float64)[:, np.newaxis] ** np.arange(4)
+    raw = np.einsum('nyp,yq->npq', stack.astype(np.float64) @ powers_x, powers_y)
+
+    m00 = raw[:, 0, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_c, y_c = raw[:, 1, 0] / m00, raw[:, 0, 1] / m00
+    x_c, y_c = np.nan_to_num(x_c), np.nan_to_num(y_c)
+
+    mu = {
+        (2, 0): raw[:, 2, 0] - x_c * raw[:, 1, 0],
+        (0, 2): raw[:, 0, 2] - y_c * raw[:, 0, 1],
+        (1, 1): raw[:, 1, 1] - x_c * raw[:, 0, 1],
+        (3, 0): raw[:, 3, 0] - 3 * x_c * raw[:, 2, 0] + 2 * x_c ** 2 * raw[:, 1, 0],
+        (0, 3): raw[:, 0, 3] - 3 * y_c * raw[:, 0, 2] + 2 * y_c ** 2 * raw[:, 0, 1],
+        (2, 1): raw[:, 2, 1] - 2 * x_c * raw[:, 1, 1] - y_c * raw[:, 2, 0] + 2 * x_c ** 2 * raw[:, 0, 1],
+        (1, 2): raw[:, 1, 2] - 2 * y_c * raw[:, 1, 1] - x_c * raw[:, 0, 2] + 2 * y_c ** 2 * raw[:, 1, 0],
+    }
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eta = {key: np.nan_to_num(value / m00 ** (1 + sum(key) / 2)) for key, value in mu.items()}
+
+    n20, n02, n11 = eta[2, 0], eta[0, 2], eta[1, 1]
+    n30, n03, n21, n12 = eta[3, 0], eta[0, 3], eta[2, 1], eta[1, 2]
+    a, b = n30 + n12, n21 + n03
+    hu = np.stack([
+        n20 + n02,
+        (n20 - n02) ** 2 + 4 * n11 ** 2,
+        (n30 - 3 * n12) ** 2 + (3 * n21 - n03) ** 2,
+        a ** 2 + b ** 2,
+        (n30 - 3 * n12) * a * (a ** 2 - 3 * b ** 2) + (3 * n21 - n03) * b * (3 * a ** 2 - b ** 2),
+        (n20 - n02) * (a ** 2 - b ** 2) + 4 * n11 * a * b,
+        (3 * n21 - n03) * a * (a ** 2 - 3 * b ** 2) - (n30 - 3 * n12) * b * (3 * a ** 2 - b ** 2),
+    ], axis=1)
+    return {'raw': raw, 'center': (x_c, y_c), 'mu': mu, 'hu': hu}
+
+
+# Признаки всех символов массива (N, высота, ширина) сразу: масса, центр
+# тяжести, центральные моменты второго порядка (на единицу массы), плотность,
+# отношение сторон и первые два инварианта Ху моментов изображения.
+# Для пустых изображений — нули.
+def extract_features_batch(stack: np.ndarray) -> np.ndarray:
+    stack = (np.asarray(stack) != 0).view(np.uint8)
+    count, height, width = stack.shape
+    moments = image_moments(stack)
+    mass = moments['raw'][:, 0, 0]
+    x_c, y_c = moments['center']
+    mu = moments['mu']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        feats = np.stack([
+            mass, x_c, y_c, mu[2, 0] / mass, mu[0, 2] / mass, mu[1, 1] / mass,
+            mass / (height * width), np.full(count, height / width if width != 0 else 0),
+            moments['hu'][:, 0], moments['hu'][:, 1],
+        ], axis=1)
+    feats[mass == 0] = 0
+    return feats
 
-    mass = len(xs)
-    x_c = xs.mean()
-    y_c = ys.mean()
-    x_m = ((xs - x_c) ** 2).mean()
-    y_m = ((ys - y_c) ** 2).mean()
-    xy_m = ((xs - x_c) * (ys - y_c)).mean()
 
-    h, w = arr.shape
-    density = mass / (h * w)
-    aspect_ratio = h / w if w != 0 else 0
+def extract_features(arr: np.ndarray) -> np.ndarray:
+    return extract_features_batch(arr[np.newaxis])[0]
 
-    img = (arr * 255).astype(np.uint8)
-    contours, _ = cv2.findContours(img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    hu = cv2.HuMoments(cv2.moments(contours[0])).flatten() if contours else np.zeros(7)
 
-    return np.concatenate(([mass, x_c, y_c, x_m, y_m, xy_m, density, aspect_ratio], hu[:2]))
+# Параметры масштабирования признаков (StandardScaler без импорта sklearn)
+class FeatureScaler(namedtuple('FeatureScaler', ['mean', 'scale'])):
+    def transform(self, feats):
+        return (np.asarray(feats, dtype=np.float64) - self.mean) / self.scale
 
 
-def load_templates():
-    feats, labels = [], []
+# Отпечаток шаблонов: имена, размеры и время изменения файлов алфавита и
+# параметры признаков. Файлы не читаются, поэтому проверка почти бесплатна.
+def template_fingerprint(alphabet_dir: Path = ALPHABET_DIR) -> str:
+    files = []
     for ch in ALPHABET:
-        path = ALPHABET_DIR / f"{ch}.bmp"
-        arr = normalize_bin(to_binary(path))
-        feat = extract_features(arr)
-        feats.append(feat)
-        labels.append(ch)
-    feats = np.array(feats)
-    scaler = StandardScaler()
-    feats = scaler.fit_transform(feats)
-    return feats, labels, scaler
+        stat = os.stat(alphabet_dir / f"{ch}.bmp")
+        files.append([ch, stat.st_size, stat.st_mtime_ns])
+    settings = {'alphabet': ALPHABET, 'size': SIZE, 'features': FEATURES_VERSION, 'files': files}
+    return hashlib.blake2b(json.dumps(settings, ensure_ascii=False).encode('utf-8'), digest_size=20).hexdigest()
+
 
+# Вычисление признаков шаблонов и запись индекса: одна запись .npy с отпечатком,
+# символами, масштабированными признаками и параметрами масштабирования
+def build_template_index(index_path: Path = TEMPLATE_INDEX, alphabet_dir: Path = ALPHABET_DIR):
+    from sklearn.preprocessing import StandardScaler
 
-def recognise_image(path: Path, template_feats: np.ndarray, labels: list[str], scaler, space_thresh: int = 20):
+    fingerprint = template_fingerprint(alphabet_dir)
+    labels = list(ALPHABET)
+    glyphs = np.stack([normalize_bin(to_binary(alphabet_dir / f"{ch}.bmp")) for ch in labels])
+    scaler = StandardScaler()
+    feats = scaler.fit_transform(extract_features_batch(glyphs))
+
+    count, width = feats.shape
+    index = np.zeros(1, dtype=[('fingerprint', 'U40'), ('labels', 'U1', (count,)),
+                               ('features', np.float64, (count, width)),
+                               ('mean', np.float64, (width,)), ('scale', np.float64, (width,))])
+    index['fingerprint'], index['labels'], index['features'] = fingerprint, labels, feats
+    index['mean'], index['scale'] = scaler.mean_, scaler.scale_
+    # Уникальный временный файл: одновременная пересборка в нескольких процессах
+    # не смешивает записи, os.replace публикует только целый индекс
+    with tempfile.NamedTemporaryFile(dir=index_path.parent, prefix=index_path.name, suffix='.tmp',
+                                     delete=False) as f:
+        temp_path = f.name
+        try:
+            np.save(f, index)
+        except BaseException:
+            f.close()
+            os.remove(temp_path)
+            raise
+    os.replace(temp_path, index_path)
+    return feats, labels, FeatureScaler(scaler.mean_, scaler.scale_)
+
+
+# Шаблоны из индекса (через memmap); индекс пересобирается, если его нет,
+# он поврежден или прежнего формата, или отпечаток алфавита и параметров
+# признаков изменился
+def load_templates(index_path: Path = TEMPLATE_INDEX, alphabet_dir: Path = ALPHABET_DIR):
+    try:
+        index = np.load(index_path, mmap_mode='r')[0]
+        if index['fingerprint'] == template_fingerprint(alphabet_dir):
+            return index['features'], index['labels'].tolist(), FeatureScaler(index['mean'], index['scale'])
+    except (OSError, ValueError, IndexError, KeyError, EOFError):
+        pass
+    return build_template_index(index_path, alphabet_dir)
+
+
+# Целое число не меньше 1 для аргументов командной строки
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"ожидается целое число не меньше 1: {value}")
+    return number
+
+
+# Сравнение признаков всех символов со всеми шаблонами одной матричной
+# операцией: квадраты расстояний |a|^2 + |b|^2 - 2ab. Возвращает номера k
+# ближайших шаблонов для каждого символа (по убыванию сходства) и сходства
+# 1 / (1 + расстояние); ближайшие выбираются частичной сортировкой.
+def match_templates(feats: np.ndarray, template_feats: np.ndarray, top_k: int | None = None):
+    if top_k is not None and top_k < 1:
+        raise ValueError(f"Число гипотез top_k должно быть не меньше 1: {top_k}")
+    squared = (np.einsum('ij,ij->i', feats, feats)[:, np.newaxis]
+               + np.einsum('ij,ij->i', template_feats, template_feats)
+               - 2 * feats @ template_feats.T)
+    similarities = 1 / (1 + np.sqrt(np.maximum(squared, 0)))
+
+    count = len(template_feats)
+    top_k = count if top_k is None else min(top_k, count)
+    if top_k < count:
+        top = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+    else:
+        top = np.broadcast_to(np.arange(count), similarities.shape)
+    top_similarities = np.take_along_axis(similarities, top, axis=1)
+    order = np.argsort(-top_similarities, axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_similarities, order, axis=1)
+
+
+def recognise_image(path: Path, template_feats: np.ndarray, labels: list[str], scaler, space_thresh: int = 20,
+                    segment=segment_by_profiles, correct_skew: bool = False, top_k: int | None = None):
     bin_img = to_binary(path)
-    boxes = segment_by_profiles(bin_img)
+    if correct_skew:
+        # Исправление наклона строки перед сегментацией
+        bin_img, _ = deskew(bin_img)
+    boxes = segment(bin_img)
     boxes.sort(key=lambda b: b[0])
     predictions, all_hypotheses = [], []
-    last_x1 = None
+    if not boxes:
+        return predictions, all_hypotheses, boxes
+
+    # Нормализация и признаки всех символов сразу, масштабирование одним вызовом
+    feats = extract_features_batch(normalize_batch(bin_img, boxes))
+    top_indices, top_similarities = match_templates(scaler.transform(feats), template_feats, top_k)
 
-    for x0, y0, x1, y1 in boxes:
+    last_x1 = None
+    for (x0, y0, x1, y1), indices, similarities in zip(boxes, top_indices.tolist(), top_similarities.tolist()):
         if last_x1 is not None and (x0 - last_x1) > space_thresh:
             predictions.append(" ")
         last_x1 = x1
 
-        sub = bin_img[y0:y1+1, x0:x1+1]
-        arr = normalize_bin(sub)
-        feat = extract_features(arr)
-        feat = scaler.transform([feat])[0]
-
-        dists = np.linalg.norm(template_feats - feat, axis=1)
-        similarities = 1 / (1 + dists)
-        top_indices = similarities.argsort()[::-1]
-        top_hypotheses = [(labels[i], round(float(similarities[i]), 4)) for i in top_indices]
-
+        top_hypotheses = [(labels[i], round(similarity, 4)) for i, similarity in zip(indices, similarities)]
         predictions.append(top_hypotheses[0][0])
         all_hypotheses.append(top_hypotheses)
 
@@ -137,11 +345,19 @@ def accuracy(pred: list[str], gt: str):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Классификация символов фразы")
+    parser.add_argument("--segmenter", choices=SEGMENTERS, default="profiles", help="Способ сегментации")
+    parser.add_argument("--deskew", action="store_true", help="Исправить наклон строки перед сегментацией")
+    parser.add_argument("--top-k", type=_positive_int, default=None, help="Число гипотез для каждого символа (по умолчанию все)")
+    args = parser.parse_args()
+
     print("[1] Загрузка шаблонов признаков…")
     template_feats, labels, scaler = load_templates()
 
     print("[2] Распознавание изображения…")
-    preds, all_hyps, boxes = recognise_image(SRC_PATH, template_feats, labels, scaler)
+    preds, all_hyps, boxes = recognise_image(SRC_PATH, template_feats, labels, scaler,
+                                             segment=SEGMENTERS[args.segmenter], correct_skew=args.deskew,
+                                             top_k=args.top_k)
     recog_str = "".join(preds)
     errs, pct = accuracy(preds, PHRASE_GT)
 
@@ -1,61 +1,54 @@
 import os
-from PIL import Image, ImageDraw, ImageFont
+import sys
+import math
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.glyphs import ATLAS_NAME, GlyphAtlas, paste_glyph
 
 FONT_PATH = 'C:/Windows/Fonts/sylfaen.ttf'  # Убедись, что шрифт поддерживает грузинские буквы
+if not os.path.exists(FONT_PATH):
+    # Копия шрифта в папке лабораторной работы
+    FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sylfaen.ttf')
 OUTPUT_DIR = 'alphabet'
 
 CANVAS_SIZE = (2048, 2048)
-BACKGROUND_COLOR = 'white'
-TEXT_COLOR = 'black'
 
 # Грузинские строчные буквы
 ALPHABET = list("აბგდევზთიკლმნოპჟრსტუფქღყშჩცძწჭხჯჰ")
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Кэш шрифтов и отрисованных букв; сохраняется между запусками
+atlas = GlyphAtlas(os.path.join(OUTPUT_DIR, ATLAS_NAME))
+
+
 def get_max_font_size(letter: str, canvas_size: tuple[int, int]) -> int:
-    """Бинарный поиск максимального размера шрифта, чтобы буква влезла в холст."""
-    min_size, max_size = 1, max(canvas_size)
-    best = min_size
-    img = Image.new('RGB', canvas_size)
-    draw = ImageDraw.Draw(img)
-    while min_size <= max_size:
-        mid = (min_size + max_size) // 2
-        font = ImageFont.truetype(FONT_PATH, mid)
-        bbox = draw.textbbox((0, 0), letter, font=font)
-        w, h = bbox[2] - bbox[0], bbox[3] - bbox[1]
-        if w <= canvas_size[0] and h <= canvas_size[1]:
-            best = mid
-            min_size = mid + 1
-        else:
-            max_size = mid - 1
-    return best
+    """Максимальный размер шрифта, чтобы буква влезла в холст (по одному измерению)."""
+    return atlas.fit_size(letter, FONT_PATH, canvas_size)
+
+
+PAD = 2
 
 for letter in ALPHABET:
     font_size = get_max_font_size(letter, CANVAS_SIZE)
-    font = ImageFont.truetype(FONT_PATH, font_size)
 
-    img = Image.new('RGB', CANVAS_SIZE, BACKGROUND_COLOR)
-    draw = ImageDraw.Draw(img)
-    bbox = draw.textbbox((0, 0), letter, font=font)
+    # Буква по центру холста; дробная часть координат влияет на сглаживание
+    bbox = atlas.text_bbox(letter, FONT_PATH, font_size)
     x = (CANVAS_SIZE[0] - (bbox[2] - bbox[0])) / 2 - bbox[0]
     y = (CANVAS_SIZE[1] - (bbox[3] - bbox[1])) / 2 - bbox[1]
-    draw.text((x, y), letter, font=font, fill=TEXT_COLOR)
-
-    # Маска для обрезки
-    mask = Image.new('L', CANVAS_SIZE, 0)
-    draw_mask = ImageDraw.Draw(mask)
-    draw_mask.text((x, y), letter, font=font, fill=255)
-    letter_bbox = mask.getbbox()
+    glyph = atlas.glyph(letter, FONT_PATH, font_size, phase=(math.modf(x)[0], math.modf(y)[0]))
 
-    pad = 2
-    left   = max(letter_bbox[0] - pad, 0)
-    top    = max(letter_bbox[1] - pad, 0)
-    right  = min(letter_bbox[2] + pad, CANVAS_SIZE[0])
-    bottom = min(letter_bbox[3] + pad, CANVAS_SIZE[1])
+    # Обрезка по краске с полями PAD, не выходя за холст
+    left = max(int(x) + glyph.left - PAD, 0)
+    top = max(int(y) + glyph.top - PAD, 0)
+    right = min(int(x) + glyph.left + glyph.mask.shape[1] + PAD, CANVAS_SIZE[0])
+    bottom = min(int(y) + glyph.top + glyph.mask.shape[0] + PAD, CANVAS_SIZE[1])
 
-    # Обрезка и сохранение
-    cropped = img.crop((left, top, right, bottom))
-    cropped.save(os.path.join(OUTPUT_DIR, f'{letter}.bmp'), format='BMP')
+    cropped = np.full((bottom - top, right - left), 255, dtype=np.uint8)
+    paste_glyph(cropped, glyph, int(x) - left, int(y) - top)
+    Image.fromarray(cropped).convert('RGB').save(os.path.join(OUTPUT_DIR, f'{letter}.bmp'), format='BMP')
 
-print("✅ Генерация алфавита завершена. Файлы сохранены в:", OUTPUT_DIR)
\ No newline at end of file
+atlas.save()
+print("✅ Генерация алфавита завершена. Файлы сохранены в:", OUTPUT_DIR)
@@ -1,10 +1,14 @@
 import os
+import sys
 import glob
+import argparse
 import colorsys
 import numpy as np
 from pathlib import Path
 from PIL import Image
-import matplotlib.pyplot as plt
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.plots import BACKENDS, save_heatmap, save_histogram
 
 SRC_DIR = "pictures_src"
 DST_DIR = "pictures_results"
@@ -71,7 +75,7 @@ def compute_features(S: np.ndarray):
 
     return NN, SM, ENT
 
-def process_image(path: str):
+def process_image(path: str, backend: str = "fast"):
     name = Path(path).stem
     img = Image.open(path).convert("RGB")
     arr = np.array(img)
@@ -94,20 +98,11 @@ def process_image(path: str):
     Image.fromarray(L_eq_gray).save(os.path.join(DST_DIR, f"{name}_gray_eq.png"))
     Image.fromarray(arr_eq).save(os.path.join(DST_DIR, f"{name}_color_eq.png"))
 
-    plt.figure(); plt.hist(L_gray.ravel(), bins=256); plt.title("L до");
-    plt.savefig(os.path.join(DST_DIR, f"{name}_hist_before.png")); plt.close()
-    plt.figure(); plt.hist(L_eq_gray.ravel(), bins=256); plt.title("L после");
-    plt.savefig(os.path.join(DST_DIR, f"{name}_hist_after.png")); plt.close()
-
-    plt.figure(figsize=(10, 6))
-    plt.imshow(np.log1p(S_ngl), cmap='viridis', aspect='auto')
-    plt.colorbar(label='Log(count)')
-    plt.title("NGLDM Matrix (log scale)")
-    plt.xlabel("Dependence count")
-    plt.ylabel("Gray level")
-    plt.tight_layout()
-    plt.savefig(os.path.join(DST_DIR, f"{name}_ngldm.png"), dpi=100)
-    plt.close()
+    save_histogram(L_gray, os.path.join(DST_DIR, f"{name}_hist_before.png"), backend=backend, title="L до")
+    save_histogram(L_eq_gray, os.path.join(DST_DIR, f"{name}_hist_after.png"), backend=backend, title="L после")
+    save_heatmap(np.log1p(S_ngl), os.path.join(DST_DIR, f"{name}_ngldm.png"), backend=backend,
+                 title="NGLDM Matrix (log scale)", xlabel="Dependence count", ylabel="Gray level",
+                 colorbar_label='Log(count)')
 
     with open(os.path.join(DST_DIR, f"{name}_features.txt"), "w", encoding="utf-8") as f:
         f.write(f"NN до: {NN0:.4f}\nSM до: {SM0:.4f}\nENT до: {ENT0:.4f}\n")
@@ -116,10 +111,14 @@ def process_image(path: str):
     print(f"[✓] {name}: NN {NN0:.2f}->{NN1:.2f}, SM {SM0:.4f}->{SM1:.4f}, ENT {ENT0:.2f}->{ENT1:.2f}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Выравнивание гистограммы и признаки NGLDM")
+    parser.add_argument("--backend", choices=BACKENDS, default="fast", help="Способ отрисовки графиков")
+    args = parser.parse_args()
+
     files = glob.glob(os.path.join(SRC_DIR, "*.*"))
     for path in files:
         try:
-            process_image(path)
+            process_image(path, args.backend)
         except Exception as e:
             print(f"[!] {path} — ошибка: {e}")
 
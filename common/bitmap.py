@@ -0,0 +1,80 @@
+import numpy as np
+
+# Число единичных битов для каждого значения байта
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+# Бинарное изображение, упакованное по 8 пикселей в байт (np.packbits по строкам).
+# Биты за правым краем изображения всегда нулевые.
+class PackedBitmap:
+    def __init__(self, bits, width):
+        bits = np.asarray(bits, dtype=np.uint8)
+        if bits.ndim != 2 or bits.shape[1] != (width + 7) // 8:
+            raise ValueError(f"Упакованный массив {bits.shape} не соответствует ширине {width}")
+        self.bits = bits
+        self.width = width
+
+    # Упаковка массива: ненулевые пиксели становятся единицами
+    @classmethod
+    def from_array(cls, array):
+        array = np.asarray(array)
+        return cls(np.packbits(array != 0, axis=1), array.shape[1])
+
+    # Пороговая бинаризация полутонового изображения: единица там, где яркость
+    # больше порога (или не больше при invert=True)
+    @classmethod
+    def from_grayscale(cls, grayscale, threshold=128, invert=False):
+        grayscale = np.asarray(grayscale)
+        mask = grayscale <= threshold if invert else grayscale > threshold
+        return cls(np.packbits(mask, axis=1), grayscale.shape[1])
+
+    @property
+    def shape(self):
+        return self.bits.shape[0], self.width
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    # Распаковка в массив со значениями 0 и value (1 или 255)
+    def to_array(self, value=1, dtype=np.uint8):
+        array = np.unpackbits(self.bits, axis=1, count=self.width).astype(dtype, copy=False)
+        if value != 1:
+            array *= value
+        return array
+
+    # Количество единичных пикселей
+    def count(self):
+        return int(POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    # Профиль по Y: число единиц в каждой строке
+    def profile_y(self):
+        return POPCOUNT[self.bits].sum(axis=1, dtype=np.int64)
+
+    # Профиль по X: число единиц в каждом столбце (по одному проходу на позицию бита)
+    def profile_x(self):
+        profile = np.empty((self.bits.shape[1], 8), dtype=np.int64)
+        for bit in range(8):
+            profile[:, bit] = ((self.bits >> (7 - bit)) & 1).sum(axis=0, dtype=np.int64)
+        return profile.ravel()[:self.width]
+
+    # Вырезание области [y0:y1, x0:x1]; распаковываются только байты внутри области
+    def crop(self, y0, y1, x0, x1):
+        y0, y1, _ = slice(y0, y1).indices(self.bits.shape[0])
+        x0, x1, _ = slice(x0, x1).indices(self.width)
+        x1 = max(x0, x1)
+        if x0 % 8 == 0:
+            bits = self.bits[y0:y1, x0 // 8:(x1 + 7) // 8].copy()
+            if x1 % 8:
+                bits[:, -1] &= np.uint8((0xFF << (8 - x1 % 8)) & 0xFF)
+            return PackedBitmap(bits, x1 - x0)
+        block = np.unpackbits(self.bits[y0:y1, x0 // 8:(x1 + 7) // 8], axis=1)
+        offset = x0 - x0 // 8 * 8
+        return PackedBitmap.from_array(block[:, offset:offset + x1 - x0])
+
+    def __getitem__(self, key):
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        if not isinstance(rows, slice) or not isinstance(cols, slice) or \
+                rows.step not in (None, 1) or cols.step not in (None, 1):
+            raise IndexError("PackedBitmap поддерживает только срезы с шагом 1")
+        return self.crop(rows.start, rows.stop, cols.start, cols.stop)
@@ -0,0 +1,162 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Связные компоненты: рамки (y1, y2, x1, x2) (y2, x2 не включаются), площади
+# в пикселях и маски компонент в их рамках. Для пакета строк line — номер
+# строки компоненты.
+Components = namedtuple('Components', ['boxes', 'areas', 'masks', 'line'])
+
+
+# Отрезки ненулевых пикселей всех строк изображения по развернутому массиву;
+# после каждой строки — пустой столбец-разделитель, поэтому границы отрезков
+# (одно сравнение соседних элементов) чередуются: начало, конец, начало...
+# Возвращает строки, начала и концы отрезков (конец не включается).
+def find_runs(image):
+    image = np.asarray(image)
+    height, width = image.shape
+    mask = np.zeros((height, width + 1), dtype=bool)
+    np.not_equal(image, 0, out=mask[:, :width])
+    flat = mask.ravel()
+    edges = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    if flat[:1].any():
+        edges = np.r_[0, edges]
+    starts, ends = edges[0::2], edges[1::2]
+    rows = starts // (width + 1)
+    offsets = rows * (width + 1)
+    return rows, starts - offsets, ends - offsets
+
+
+# Пары соприкасающихся отрезков соседних строк (8-связность; 4-связность — без
+# касания углами). Для каждого отрезка диапазон отрезков строки выше находится
+# двумя searchsorted по отсортированным началам и концам.
+def _run_pairs(rows, starts, ends, width, connectivity=8):
+    key = rows * (width + 1)
+    corner = 1 if connectivity == 8 else 0
+    above = key - (width + 1)
+    low = np.searchsorted(key + ends, above + starts - corner, side='right')
+    high = np.searchsorted(key + starts, above + ends + corner, side='left')
+    counts = np.maximum(high - low, 0)
+    lower = np.repeat(np.arange(len(starts)), counts)
+    upper = np.repeat(low - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    return upper, lower
+
+
+# Объединение множеств для всех пар сразу: подвешивание корня с большим номером
+# к корню с меньшим (np.minimum.at) и сжатие путей, пока пары не окажутся в
+# одном множестве. Возвращает номер корня для каждого элемента.
+def union_find(count, first, second):
+    parent = np.arange(count)
+    while len(first):
+        root_first, root_second = parent[first], parent[second]
+        differ = root_first != root_second
+        if not differ.any():
+            break
+        first, second = first[differ], second[differ]
+        root_first, root_second = root_first[differ], root_second[differ]
+        np.minimum.at(parent, np.maximum(root_first, root_second), np.minimum(root_first, root_second))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    return parent
+
+
+# Последовательные номера компонент (в порядке первого отрезка) по корням
+def _relabel(roots):
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels.ravel()
+
+
+# Рамки и площади групп отрезков
+def _boxes(labels, count, rows, starts, ends):
+    boxes = np.empty((count, 4), dtype=np.int64)
+    boxes[:, 0] = boxes[:, 2] = np.iinfo(np.int64).max
+    boxes[:, 1] = boxes[:, 3] = -1
+    np.minimum.at(boxes[:, 0], labels, rows)
+    np.maximum.at(boxes[:, 1], labels, rows + 1)
+    np.minimum.at(boxes[:, 2], labels, starts)
+    np.maximum.at(boxes[:, 3], labels, ends)
+    areas = np.bincount(labels, weights=ends - starts, minlength=count).astype(np.int64)
+    return boxes, areas
+
+
+# Пары компонент, которые нужно объединить в один символ:
+# - по перекрытию: проекции на X перекрываются не меньше чем на min_overlap
+#   ширины более узкой компоненты (точки и знаки над буквой, вложенные части);
+# - по расстоянию: промежуток между рамками по X и по Y не больше max_distance
+#   (разорванные штрихи).
+# Кандидаты — компоненты той же строки line, начинающиеся по X не дальше конца
+# текущей плюс max_distance (поиск по началам, отсортированным внутри строк).
+def merge_pairs(boxes, min_overlap=0.5, max_distance=1, line=None):
+    max_distance = max(max_distance, 0)
+    line = np.zeros(len(boxes), dtype=np.int64) if line is None else line
+    # Ключ сортировки: строки не пересекаются, промежуток между ними больше max_distance
+    stride = (boxes[:, 3].max() if len(boxes) else 0) + max_distance + 1
+    order = np.lexsort((boxes[:, 2], line))
+    sorted_boxes = boxes[order]
+    x1 = line[order] * stride + sorted_boxes[:, 2]
+    x2 = line[order] * stride + sorted_boxes[:, 3]
+    high = np.searchsorted(x1, x2 + max_distance, side='right')
+    counts = high - np.arange(len(boxes)) - 1
+    counts = np.maximum(counts, 0)
+    first = np.repeat(np.arange(len(boxes)), counts)
+    second = first + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    a, b = sorted_boxes[first], sorted_boxes[second]
+    overlap = np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 2], b[:, 2])
+    narrower = np.minimum(a[:, 3] - a[:, 2], b[:, 3] - b[:, 2])
+    gap_x = -overlap
+    gap_y = np.maximum(a[:, 0], b[:, 0]) - np.minimum(a[:, 1], b[:, 1])
+    merge = (overlap >= min_overlap * narrower) | ((gap_x <= max_distance) & (gap_y <= max_distance))
+    return order[first[merge]], order[second[merge]]
+
+
+# Маска каждой компоненты в ее рамке: изображение номеров компонент
+# заполняется по всем отрезкам сразу, маска — сравнение среза с номером
+def _masks(labels, boxes, line_tops, rows, starts, ends, shape):
+    lengths = ends - starts
+    offsets = np.cumsum(lengths) - lengths
+    pixels = np.repeat(rows * shape[1] + starts - offsets, lengths) + np.arange(lengths.sum())
+    label_image = np.full(shape, -1, dtype=np.int32)
+    label_image.ravel()[pixels] = np.repeat(labels, lengths)
+    return [label_image[top + y1:top + y2, x1:x2] == label
+            for label, (top, (y1, y2, x1, x2)) in enumerate(zip(line_tops.tolist(), boxes.tolist()))]
+
+
+# Связные компоненты бинарного изображения (ненулевые пиксели — символ) за
+# один проход по отрезкам строк. Изображение может быть пакетом строк
+# (N, высота, ширина): строки разделяются пустой строкой пикселей.
+# merge=True — объединение компонент по правилам merge_pairs.
+# Компоненты упорядочены по строке пакета и левому краю.
+def connected_components(image, connectivity=8, merge=False, min_overlap=0.5, max_distance=1, masks=True):
+    image = np.asarray(image)
+    height = image.shape[-2]
+    flat = image.reshape(-1, image.shape[-1])
+    real_rows, starts, ends = find_runs(flat)
+    # Между строками пакета — пустая строка пикселей (без копирования изображения)
+    line_height = height + 1
+    rows = real_rows + real_rows // height
+
+    upper, lower = _run_pairs(rows, starts, ends, flat.shape[1], connectivity)
+    labels = _relabel(union_find(len(starts), upper, lower))
+    boxes, areas = _boxes(labels, labels.max() + 1 if len(labels) else 0, rows, starts, ends)
+    line = boxes[:, 0] // line_height
+
+    if merge and len(boxes):
+        first, second = merge_pairs(boxes, min_overlap, max_distance, line)
+        groups = _relabel(union_find(len(boxes), first, second))
+        labels = groups[labels]
+        boxes, areas = _boxes(labels, groups.max() + 1, rows, starts, ends)
+        line = boxes[:, 0] // line_height
+
+    order = np.lexsort((boxes[:, 2], line))
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    labels, boxes, areas, line = rank[labels], boxes[order], areas[order], line[order]
+
+    # Координаты Y — внутри своей строки пакета
+    boxes[:, :2] -= (line * line_height)[:, np.newaxis]
+    component_masks = _masks(labels, boxes, line * height, real_rows, starts, ends, flat.shape) if masks else None
+    return Components(boxes, areas, component_masks, line)
@@ -0,0 +1,77 @@
+import math
+
+import cv2
+import numpy as np
+
+from common.bitmap import PackedBitmap
+
+# Уровни поиска угла: (уменьшение изображения, шаг угла в градусах).
+# Первый уровень перебирает весь диапазон, следующие — окрестность лучшего
+# угла предыдущего уровня радиусом в его шаг.
+SKEW_LEVELS = ((4, 0.5), (1, 0.05))
+
+
+# Уменьшение бинарного изображения в scale раз: число единиц в каждом блоке
+def _downsample(image, scale):
+    if scale == 1:
+        return image
+    height, width = image.shape[0] // scale * scale, image.shape[1] // scale * scale
+    blocks = image[:height, :width].reshape(height // scale, scale, width // scale, scale)
+    return blocks.sum(axis=(1, 3), dtype=np.int32)
+
+
+# Оценка профилей Y для всех углов сразу: столбец x сдвигается по вертикали
+# на round(x * tan(угла)) (сдвиг вместо поворота), профили всех углов
+# собираются одним bincount. Мера — сумма квадратов профиля: масса и число
+# ячеек одинаковы для всех углов, поэтому она отличается от дисперсии профиля
+# только постоянными.
+def _profile_scores(image, angles):
+    ys, xs = np.nonzero(image)
+    weights = image[ys, xs].astype(np.float64)
+    tangents = np.tan(np.radians(angles))
+    shift = int(math.ceil(image.shape[1] * np.abs(tangents).max())) + 1
+    bins_count = image.shape[0] + 2 * shift
+
+    offsets = np.rint(tangents[:, np.newaxis] * xs).astype(np.int64)
+    bins = ys - offsets + shift + (np.arange(len(angles)) * bins_count)[:, np.newaxis]
+    profiles = np.bincount(bins.ravel(), weights=np.broadcast_to(weights, bins.shape).ravel(),
+                           minlength=len(angles) * bins_count).reshape(len(angles), bins_count)
+    return np.einsum('ij,ij->i', profiles, profiles)
+
+
+# Угол наклона строк (в градусах; положительный — строка опускается вправо)
+# по максимуму дисперсии профиля Y: грубый перебор на уменьшенном изображении,
+# уточнение — на исходном около лучшего угла
+def estimate_skew(binary, max_angle=5.0, levels=SKEW_LEVELS):
+    if isinstance(binary, PackedBitmap):
+        binary = binary.to_array()
+    binary = (np.asarray(binary) != 0).view(np.uint8)
+    if not binary.any():
+        return 0.0
+
+    best, radius = 0.0, max_angle
+    for scale, step in levels:
+        image = _downsample(binary, scale)
+        count = int(round(radius / step))
+        angles = best + np.arange(-count, count + 1) * step
+        angles = angles[np.abs(angles) <= max_angle + 1e-9]
+        best = float(angles[np.argmax(_profile_scores(image, angles))])
+        radius = step
+    return round(best, 6)
+
+
+# Исправление наклона одним поворотом изображения (размер сохраняется).
+# angle=None — угол оценивается по изображению (единицы — символ).
+# Для бинарных изображений — ближайший сосед, fill — цвет новых пикселей.
+def deskew(image, angle=None, fill=0, interpolation=cv2.INTER_NEAREST, max_angle=5.0):
+    image = np.asarray(image)
+    if angle is None:
+        angle = estimate_skew(image, max_angle)
+    if angle == 0:
+        return image, angle
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    source = image.view(np.uint8) if image.dtype == bool else image
+    rotated = cv2.warpAffine(source, matrix, (width, height), flags=interpolation,
+                             borderMode=cv2.BORDER_CONSTANT, borderValue=fill)
+    return rotated.view(bool) if image.dtype == bool else rotated, angle
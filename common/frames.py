@@ -0,0 +1,57 @@
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.bmp', '.jpg', '.jpeg', '.tif', '.tiff')
+
+
+# Источник кадров: стек .npy (N, H, W[, C]) отображается в память, папка или шаблон
+# glob читаются по одному изображению (порядок каналов — BGR, как у cv2.imread).
+# Возвращает форму кадра и итератор кадров.
+def open_frames(source, grayscale=False):
+    if source.lower().endswith('.npy'):
+        stack = np.load(source, mmap_mode='r')
+        return stack.shape[1:], (stack[index] for index in range(stack.shape[0]))
+
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source)
+    paths = sorted(path for path in paths if path.lower().endswith(IMAGE_EXTENSIONS))
+    if not paths:
+        raise ValueError(f"В {source} нет изображений")
+
+    flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+    first = cv2.imread(paths[0], flags)
+
+    def frames():
+        yield first
+        for path in paths[1:]:
+            yield cv2.imread(path, flags)
+
+    return first.shape, frames()
+
+
+# Обработка потока кадров объектом с методом process(frame).
+# on_result(index, result) вызывается для каждого кадра; результаты — буферы
+# обработчика, они перезаписываются следующим кадром.
+def run_stream(processor, frames, on_result=None):
+    count = 0
+    start = time.perf_counter()
+    for index, frame in enumerate(frames):
+        result = processor.process(frame)
+        if on_result is not None:
+            on_result(index, result)
+        count += 1
+    elapsed = time.perf_counter() - start
+    fps = count / elapsed if elapsed > 0 else float('inf')
+    print(f"Обработано кадров: {count} за {elapsed:.2f} с ({fps:.1f} кадр/с)")
+    return count, fps
+
+
+def check_frame_shape(frame, shape):
+    if frame.shape != shape:
+        raise ValueError(f"Размер кадра {frame.shape} не совпадает с настроенным {shape}")
@@ -0,0 +1,137 @@
+import io
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image, ImageFont
+
+# Имя файла кэша атласа в папке результатов генератора
+ATLAS_NAME = '.glyph_atlas.npz'
+ATLAS_VERSION = 1
+
+# Изображение символа: покрытие краской 0–255 с полями padding и положение
+# левого верхнего угла относительно целой части точки, в которой рисуется текст
+Glyph = namedtuple('Glyph', ['mask', 'left', 'top'])
+
+
+# Атлас символов: кэш загруженных шрифтов и отрисованных символов
+# по ключу (шрифт, размер, символ, поля, дробная часть точки отрисовки). Файл шрифта читается один раз,
+# шрифты нужного размера создаются из байтов в памяти. Атлас можно сохранить
+# на диск и загрузить при следующем запуске.
+class GlyphAtlas:
+    def __init__(self, path=None):
+        self.path = path
+        self._font_data = {}
+        self._fonts = {}
+        self._glyphs = {}
+        self._dirty = False
+        if path is not None and os.path.exists(path):
+            self._load(path)
+
+    # font_path=None — встроенный шрифт PIL
+    def font(self, font_path, size):
+        key = (font_path, size)
+        if key not in self._fonts and font_path is None:
+            self._fonts[key] = ImageFont.load_default(size)
+        elif key not in self._fonts:
+            if font_path not in self._font_data:
+                # Шрифт может быть задан именем из системных папок: путь находит PIL
+                resolved = font_path if os.path.exists(font_path) else ImageFont.truetype(font_path, size).path
+                with open(resolved, 'rb') as file:
+                    self._font_data[font_path] = file.read()
+            self._fonts[key] = ImageFont.truetype(io.BytesIO(self._font_data[font_path]), size)
+        return self._fonts[key]
+
+    # phase — дробные части координат точки отрисовки: PIL сглаживает символ
+    # с учетом положения внутри пикселя
+    def glyph(self, char, font_path, size, padding=0, phase=(0.0, 0.0)):
+        key = (font_path, size, char, padding, tuple(phase))
+        if key not in self._glyphs:
+            self._glyphs[key] = self._render(char, self.font(font_path, size), padding, phase)
+            self._dirty = True
+        return self._glyphs[key]
+
+    # Растеризация символа тем же вызовом, что в draw.text (getmask2 с дробной
+    # частью точки отрисовки), и обрезка по краске
+    @staticmethod
+    def _render(char, font, padding, phase):
+        core, (offset_x, offset_y) = font.getmask2(char, 'L', start=tuple(phase))
+        canvas = Image.new('L', core.size, 0)
+        canvas.im.paste(255, (0, 0) + core.size, core)
+        mask = np.array(canvas)
+
+        rows = np.flatnonzero(mask.any(axis=1))
+        columns = np.flatnonzero(mask.any(axis=0))
+        if len(rows) == 0:
+            return Glyph(np.zeros((2 * padding, 2 * padding), dtype=np.uint8), offset_x - padding, offset_y - padding)
+        y0, y1, x0, x1 = rows[0], rows[-1] + 1, columns[0], columns[-1] + 1
+        mask = np.pad(mask[y0:y1, x0:x1], padding)
+        return Glyph(mask, int(offset_x + x0 - padding), int(offset_y + y0 - padding))
+
+    # Рамка текста символа (как draw.textbbox в точке (0, 0))
+    def text_bbox(self, char, font_path, size):
+        return self.font(font_path, size).getbbox(char)
+
+    def text_size(self, char, font_path, size):
+        left, top, right, bottom = self.text_bbox(char, font_path, size)
+        return right - left, bottom - top
+
+    # Наибольший размер шрифта, при котором рамка символа помещается в холст.
+    # Размер оценивается по одному измерению (рамка растет пропорционально
+    # размеру шрифта) и уточняется проверкой соседних размеров.
+    def fit_size(self, char, font_path, canvas_size, reference_size=None):
+        reference_size = reference_size or min(canvas_size)
+        width, height = self.text_size(char, font_path, reference_size)
+        scale = min(canvas_size[0] / max(width, 1), canvas_size[1] / max(height, 1))
+        size = int(np.clip(int(reference_size * scale), 1, max(canvas_size)))
+
+        def fits(size):
+            width, height = self.text_size(char, font_path, size)
+            return width <= canvas_size[0] and height <= canvas_size[1]
+
+        while size > 1 and not fits(size):
+            size -= 1
+        while size < max(canvas_size) and fits(size + 1):
+            size += 1
+        return size
+
+    def _load(self, path):
+        with np.load(path) as data:
+            index = json.loads(str(data['index']))
+            if index.get('version') != ATLAS_VERSION:
+                return
+            for number, (font_path, size, char, padding, phase, left, top) in enumerate(index['glyphs']):
+                self._glyphs[(font_path, size, char, padding, tuple(phase))] = Glyph(data[f'glyph_{number}'], left, top)
+
+    # Сохранение атласа (только если появились новые символы)
+    def save(self, path=None):
+        path = path or self.path
+        if path is None or not self._dirty:
+            return
+        glyphs, arrays = [], {}
+        for number, (key, glyph) in enumerate(self._glyphs.items()):
+            glyphs.append([*key, int(glyph.left), int(glyph.top)])
+            arrays[f'glyph_{number}'] = glyph.mask
+        index = json.dumps({'version': ATLAS_VERSION, 'glyphs': glyphs}, ensure_ascii=False)
+        temp_path = path + '.tmp.npz'
+        np.savez_compressed(temp_path, index=np.array(index), **arrays)
+        os.replace(temp_path, path)
+        self._dirty = False
+
+
+# Наложение символа черным цветом на полутоновое изображение (как draw.text
+# с fill=0 в точке с целой частью (x, y)); часть за краем изображения отбрасывается
+def paste_glyph(canvas, glyph, x, y):
+    height, width = glyph.mask.shape
+    left, top = x + glyph.left, y + glyph.top
+    y0, x0 = max(top, 0), max(left, 0)
+    y1, x1 = min(top + height, canvas.shape[0]), min(left + width, canvas.shape[1])
+    if y0 >= y1 or x0 >= x1:
+        return canvas
+    region = canvas[y0:y1, x0:x1]
+    mask = glyph.mask[y0 - top:y1 - top, x0 - left:x1 - left]
+    # Смешивание с черным в целых числах по той же формуле, что в PIL
+    blended = region.astype(np.uint32) * (255 - mask) + 128
+    np.copyto(region, (blended + (blended >> 8)) >> 8, casting='unsafe')
+    return canvas
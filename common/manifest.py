@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = '.manifest.json'
+MANIFEST_VERSION = 1
+
+_CHUNK_SIZE = 1 << 20
+
+
+# Хеш содержимого файла
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Манифест инкрементальной обработки папки: для каждого входного файла хранит
+# хеш содержимого, размер, время изменения, параметры обработки и список выходов.
+# Файл считается актуальным, если параметры не менялись, все выходы на месте,
+# а содержимое совпадает с записанным. Хеш пересчитывается, только если
+# изменились размер или время изменения файла.
+class Manifest:
+    def __init__(self, path, params):
+        self.path = path
+        self.params = json.loads(json.dumps(params, sort_keys=True))
+        self.entries = {}
+        self._seen = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('files', {})
+
+    @staticmethod
+    def _key(input_path):
+        return os.path.basename(input_path)
+
+    def is_up_to_date(self, input_path, outputs):
+        key = self._key(input_path)
+        self._seen.add(key)
+        entry = self.entries.get(key)
+        if entry is None or entry['params'] != self.params:
+            return False
+        outputs = list(outputs)
+        if sorted(outputs) != entry['outputs'] or not all(os.path.exists(path) for path in outputs):
+            return False
+
+        stat = os.stat(input_path)
+        if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+        if stat.st_size != entry['size'] or file_hash(input_path) != entry['hash']:
+            return False
+
+        # Содержимое не изменилось, обновляем только время изменения
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+
+    def record(self, input_path, outputs):
+        key = self._key(input_path)
+        self._seen.add(key)
+        stat = os.stat(input_path)
+        self.entries[key] = {
+            'hash': file_hash(input_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'params': self.params,
+            'outputs': sorted(outputs),
+        }
+
+    # Сохранение манифеста; записи о файлах, которых больше нет во входной папке, удаляются
+    def save(self):
+        files = {key: entry for key, entry in self.entries.items() if key in self._seen}
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'version': MANIFEST_VERSION, 'files': files}, file, ensure_ascii=False)
+        os.replace(temp_path, self.path)
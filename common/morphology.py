@@ -0,0 +1,307 @@
+import cv2
+import numpy as np
+
+# Начиная с этой длины окна одномерный проход выполняется алгоритмом
+# ван Херка — Гил-Вермана (O(1) на пиксель); для более коротких окон быстрее
+# векторизованный проход OpenCV (его время при такой длине ограничено)
+VHGW_MIN_LENGTH = 128
+
+_CV2_DTYPES = (np.uint8, np.uint16, np.int16, np.float32, np.float64)
+
+# Небольшие элементы обрабатываются OpenCV напрямую, без разложения
+DIRECT_MAX_SIZE = 31
+
+# Высота полосы строк в dilate_diff
+DIFF_BAND_ROWS = 128
+
+
+# Структурирующие элементы
+def rectangle(height, width=None):
+    return np.ones((height, height if width is None else width), dtype=np.uint8)
+
+
+def disk(radius):
+    y, x = np.ogrid[-radius:radius + 1, -radius:radius + 1]
+    return (x * x + y * y <= radius * radius).astype(np.uint8)
+
+
+# Восьмиугольник радиуса radius — приближение диска, которое раскладывается на
+# четыре отрезка (см. _octagon_morph). Описан около круга: на осях и
+# диагоналях граница совпадает с окружностью, вершины выходят за нее не больше
+# чем на 9% радиуса.
+def octagon(radius):
+    point = np.zeros((2 * radius + 1, 2 * radius + 1), dtype=np.uint8)
+    point[radius, radius] = 1
+    return _octagon_morph(point, radius, np.maximum, 0)
+
+
+def cross(size=3):
+    element = np.zeros((size, size), dtype=np.uint8)
+    element[size // 2, :] = 1
+    element[:, size // 2] = 1
+    return element
+
+
+# Радиус окрестности элемента по осям (ореол для обработки по плиткам)
+def element_halo(element):
+    size_y, size_x = np.asarray(element).shape
+    return size_y // 2, size_x // 2
+
+
+# Нейтральный элемент для максимума и минимума заданного типа
+def _neutral(dtype, op):
+    if np.issubdtype(dtype, np.floating):
+        return -np.inf if op is np.maximum else np.inf
+    info = np.iinfo(dtype)
+    return info.min if op is np.maximum else info.max
+
+
+# Максимум/минимум по окну длины length вдоль первой оси (алгоритм ван Херка —
+# Гил-Вермана): out[k] = op(array[k:k + length]), по три операции на пиксель
+# независимо от длины окна. Префиксы и суффиксы блоков считаются циклом по
+# позиции внутри блока — каждая операция сразу над строками всех блоков.
+def _window_reduce(array, length, op, neutral):
+    if length == 1:
+        return array
+    n = array.shape[0]
+    rest = array.shape[1:]
+    blocks = -(-n // length)
+    padded = np.full((blocks * length,) + rest, neutral, dtype=array.dtype)
+    padded[:n] = array
+    padded = padded.reshape((blocks, length) + rest)
+
+    # Префиксы и суффиксы внутри блоков
+    prefix = np.empty_like(padded)
+    suffix = np.empty_like(padded)
+    prefix[:, 0] = padded[:, 0]
+    suffix[:, -1] = padded[:, -1]
+    for i in range(1, length):
+        op(prefix[:, i - 1], padded[:, i], out=prefix[:, i])
+        op(suffix[:, -i], padded[:, -i - 1], out=suffix[:, -i - 1])
+    prefix = prefix.reshape((-1,) + rest)
+    suffix = suffix.reshape((-1,) + rest)
+
+    count = n - length + 1
+    return op(suffix[:count], prefix[length - 1:length - 1 + count])
+
+
+# Горизонтальные отрезки элемента: (строка, начальный столбец, длина)
+def _runs(element):
+    element = np.asarray(element) != 0
+    if not element.any():
+        raise ValueError("Структурирующий элемент не содержит ни одного пикселя")
+    runs = []
+    for i, row in enumerate(element):
+        edges = np.diff(np.concatenate(([0], row.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        runs.extend((i, int(start), int(end - start)) for start, end in zip(starts, ends))
+    return runs
+
+
+# Максимум/минимум по окну длины length вдоль оси axis (0 — строки, 1 — столбцы):
+# out[k] = op(array[k:k + length])
+def _line(array, length, axis, op, neutral):
+    if length == 1:
+        return array
+    count = array.shape[axis] - length + 1
+    if length < VHGW_MIN_LENGTH and array.dtype.type in _CV2_DTYPES:
+        kernel = np.ones((1, length) if axis == 1 else (length, 1), dtype=np.uint8)
+        reduce = cv2.dilate if op is np.maximum else cv2.erode
+        result = reduce(np.ascontiguousarray(array), kernel, anchor=(0, 0),
+                        borderType=cv2.BORDER_CONSTANT)
+        return result[:, :count] if axis == 1 else result[:count]
+    if axis == 0:
+        return _window_reduce(array, length, op, neutral)
+    # Проход по столбцам — проход по строкам транспонированного массива
+    moved = np.ascontiguousarray(np.swapaxes(array, 0, 1))
+    return np.swapaxes(_window_reduce(moved, length, op, neutral), 0, 1)
+
+
+# Максимум/минимум по отрезку с центром в пикселе: out[y, x] — op по
+# array[y + k * dy, x + k * dx], |k| <= half; за краем массива — neutral.
+# Диагональный отрезок (dy = 1, dx = ±1) в развернутом массиве — окно с шагом
+# ширина ± 1: массив, разложенный по строкам такой длины, обрабатывается
+# обычным проходом по первой оси. Поля шириной half не дают окну перейти
+# через край строки.
+def _centered_line(array, half, direction, op, neutral):
+    if half == 0:
+        return array
+    length = 2 * half + 1
+    height, width = array.shape[:2]
+    rest = array.shape[2:]
+    dy, dx = direction
+    if dy == 0 or dx == 0:
+        axis = 0 if dx == 0 else 1
+        padding = [(0, 0)] * array.ndim
+        padding[axis] = (half, half)
+        return _line(np.pad(array, padding, constant_values=neutral), length, axis, op, neutral)
+
+    padding = ((half, half), (half, half)) + ((0, 0),) * len(rest)
+    padded = np.pad(array, padding, constant_values=neutral)
+    padded_width = width + 2 * half
+    step = padded_width + dx
+    flat = padded.reshape((-1,) + rest)
+    # reduced[j] — окно с началом j, то есть с центром j + half * step
+    start = half * (1 - dx)
+    needed = start + height * padded_width
+    rows = max(-(-len(flat) // step), -(-needed // step) + length - 1)
+    grid = np.full((rows * step,) + rest, neutral, dtype=array.dtype)
+    grid[:len(flat)] = flat
+    reduced = _line(grid.reshape((rows, step) + rest), length, 0, op, neutral).reshape((-1,) + rest)
+    return reduced[start:start + height * padded_width].reshape((height, padded_width) + rest)[:, :width]
+
+
+# Полудлины отрезков восьмиугольника радиуса radius: горизонтального и
+# вертикального, двух диагональных. Восьмиугольник — сумма Минковского этих
+# отрезков; по осям его радиус равен radius, по диагоналям — radius с
+# точностью до округления.
+def _octagon_halves(radius):
+    diagonal = int(round(radius * (2 - np.sqrt(2)) / 2))
+    return radius - 2 * diagonal, diagonal
+
+
+# Эрозия/дилатация восьмиугольником радиуса radius: четыре прохода по
+# отрезкам, каждый O(1) на пиксель. Частичные суммы отрезков не выходят за
+# radius по каждой оси, поэтому массив с полями radius обрабатывается точно.
+def _octagon_morph(array, radius, op, neutral):
+    straight, diagonal = _octagon_halves(radius)
+    for half, direction in ((straight, (0, 1)), (straight, (1, 0)), (diagonal, (1, 1)), (diagonal, (1, -1))):
+        array = _centered_line(array, half, direction, op, neutral)
+    return array
+
+
+# Общая часть эрозии и дилатации. Семантика совпадает с cv2.erode/cv2.dilate:
+# якорь в центре элемента, пиксели за краем изображения не учитываются.
+def _morph(image, element, op, out=None):
+    element = np.asarray(element)
+    height, width = image.shape[:2]
+    size_y, size_x = element.shape
+    anchor_y, anchor_x = size_y // 2, size_x // 2
+    neutral = _neutral(image.dtype, op)
+
+    if max(size_y, size_x) <= DIRECT_MAX_SIZE and image.dtype.type in _CV2_DTYPES:
+        reduce = cv2.dilate if op is np.maximum else cv2.erode
+        return reduce(image, element.astype(np.uint8, copy=False), dst=out)
+
+    padding = ((anchor_y, size_y - 1 - anchor_y), (anchor_x, size_x - 1 - anchor_x))
+    padding += ((0, 0),) * (image.ndim - 2)
+    padded = np.pad(image, padding, constant_values=neutral)
+
+    if out is None:
+        out = np.empty_like(image)
+
+    # Прямоугольник раскладывается на два одномерных прохода
+    if (element != 0).all():
+        horizontal = _line(padded, size_x, 1, op, neutral)
+        out[...] = _line(horizontal, size_y, 0, op, neutral)
+        return out
+
+    # Восьмиугольник (octagon) раскладывается на четыре прохода по отрезкам.
+    # Диск и другие элементы обрабатываются точно — по горизонтальным отрезкам;
+    # для быстрого приближенного результата вместо disk(r) передается octagon(r)
+    if size_y == size_x and size_y % 2 == 1 and np.array_equal(element != 0, octagon(anchor_y) != 0):
+        out[...] = _octagon_morph(padded, anchor_y, op, neutral)[anchor_y:anchor_y + height,
+                                                                  anchor_x:anchor_x + width]
+        return out
+
+    # Произвольный элемент — объединение горизонтальных отрезков;
+    # одномерный проход считается один раз для каждой длины отрезка
+    lines = {}
+    first = True
+    for i, start, length in _runs(element):
+        if length not in lines:
+            lines[length] = _line(padded, length, 1, op, neutral)
+        part = lines[length][i:i + height, start:start + width]
+        if first:
+            out[...] = part
+            first = False
+        else:
+            op(out, part, out=out)
+    return out
+
+
+def erode(image, element, out=None):
+    return _morph(image, element, np.minimum, out)
+
+
+def dilate(image, element, out=None):
+    return _morph(image, element, np.maximum, out)
+
+
+def opening(image, element, out=None):
+    return dilate(erode(image, element), element, out)
+
+
+def closing(image, element, out=None):
+    return erode(dilate(image, element), element, out)
+
+
+# Модуль разности двух изображений, записываемый в первое
+def _absdiff_inplace(result, image):
+    if result.dtype.type in _CV2_DTYPES:
+        cv2.absdiff(result, image, dst=result)
+    elif np.issubdtype(result.dtype, np.unsignedinteger):
+        larger = np.maximum(result, image)
+        np.minimum(result, image, out=result)
+        np.subtract(larger, result, out=result)
+    else:
+        np.subtract(result, image, out=result)
+        np.abs(result, out=result)
+    return result
+
+
+# Высота полосы dilate_diff с ореолом строк соседних полос сверху и снизу
+def _diff_band(element, band):
+    halo = element_halo(element)[0]
+    band = max(band, 2 * halo)
+    return band, halo
+
+
+# Рабочий буфер dilate_diff для изображений формы shape: при повторном
+# использовании (например, для потока кадров) полосы не выделяют память
+def dilate_diff_buffer(shape, dtype, element, band=DIFF_BAND_ROWS):
+    band, halo = _diff_band(element, band)
+    return np.empty((min(band + 2 * halo, shape[0]),) + tuple(shape[1:]), dtype=dtype)
+
+
+# Дилатация и модуль разности с исходным изображением за один проход по
+# полосам из band строк: полоса (с ореолом строк соседних полос) дилатируется
+# в рабочий буфер work и сразу вычитается из исходной, пока обе в кэше; в
+# выходной буфер пишется только результат. С буферами out и work элементы до
+# DIRECT_MAX_SIZE обрабатываются без выделения памяти под изображение; разложение
+# больших элементов использует временные массивы.
+def dilate_diff(image, element, out=None, band=DIFF_BAND_ROWS, work=None):
+    if out is None:
+        out = np.empty_like(image)
+    elif np.may_share_memory(out, image):
+        image = image.copy()
+    if work is None:
+        work = dilate_diff_buffer(image.shape, image.dtype, element, band)
+    band, halo = _diff_band(element, band)
+    height = image.shape[0]
+    for top in range(0, height, band):
+        bottom = min(top + band, height)
+        low, high = max(top - halo, 0), min(bottom + halo, height)
+        part = out[top:bottom]
+        part[...] = dilate(image[low:high], element, work[:high - low])[top - low:bottom - low]
+        _absdiff_inplace(part, image[top:bottom])
+    return out
+
+
+# Морфологический градиент: дилатация минус эрозия
+def gradient(image, element, out=None):
+    result = dilate(image, element, out)
+    return np.subtract(result, erode(image, element), out=result)
+
+
+# «Цилиндр»: исходное изображение минус размыкание
+def top_hat(image, element, out=None):
+    result = opening(image, element, out)
+    return np.subtract(image, result, out=result)
+
+
+# «Черная шляпа»: замыкание минус исходное изображение
+def black_hat(image, element, out=None):
+    result = closing(image, element, out)
+    return np.subtract(result, image, out=result)
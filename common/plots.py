@@ -0,0 +1,165 @@
+import numpy as np
+from PIL import Image
+
+# Размер изображения графика (ширина, высота) и поля вокруг области построения
+PLOT_SIZE = (640, 480)
+MARGIN = 40
+
+BACKGROUND = 255
+FRAME_COLOR = (0, 0, 0)
+BAR_COLOR = (31, 119, 180)
+COLORBAR_WIDTH = 12
+
+BACKENDS = ('fast', 'matplotlib')
+
+# Опорные цвета палитры viridis (равномерно от 0 до 1)
+_VIRIDIS = np.array([
+    (68, 1, 84), (71, 44, 122), (59, 81, 139), (44, 113, 142), (33, 144, 141),
+    (39, 173, 129), (92, 200, 99), (170, 220, 50), (253, 231, 37),
+], dtype=np.float64)
+
+
+# Таблица палитры из 256 цветов
+def _colormap_lut(anchors=_VIRIDIS):
+    levels = np.linspace(0, 1, len(anchors))
+    grid = np.linspace(0, 1, 256)
+    return np.stack([np.interp(grid, levels, anchors[:, channel]) for channel in range(3)],
+                    axis=1).round().astype(np.uint8)
+
+
+VIRIDIS_LUT = _colormap_lut()
+
+
+def _canvas(size):
+    width, height = size
+    return np.full((height, width, 3), BACKGROUND, dtype=np.uint8)
+
+
+# Область построения внутри полей и рамка вокруг нее
+def _plot_area(image, margin):
+    height, width = image.shape[:2]
+    image[margin - 1, margin - 1:width - margin + 1] = FRAME_COLOR
+    image[height - margin, margin - 1:width - margin + 1] = FRAME_COLOR
+    image[margin - 1:height - margin + 1, margin - 1] = FRAME_COLOR
+    image[margin - 1:height - margin + 1, width - margin] = FRAME_COLOR
+    return image[margin:height - margin, margin:width - margin]
+
+
+# Маска столбцов (value_length, index_length): [v, i] — столбец, попавший
+# в пиксель i, достает до уровня v. Если на столбец приходится не меньше трех
+# пикселей, первый пиксель остается промежутком между столбцами.
+# Пустой ряд (например, профиль пустого символа) дает пустую маску.
+def _bars_mask(values, index_length, value_length):
+    values = np.clip(np.asarray(values, dtype=np.float64), 0, None)
+    count = len(values)
+    if count == 0:
+        return np.zeros((value_length, index_length), dtype=bool)
+    top = values.max() if values.max() > 0 else 1.0
+
+    positions = np.arange(index_length) * count // index_length
+    lengths = np.rint(values[positions] / top * value_length)
+    if index_length >= 3 * count:
+        lengths[np.r_[True, positions[1:] != positions[:-1]]] = 0
+    return np.arange(value_length)[:, np.newaxis] < lengths
+
+
+# Столбчатая диаграмма в массив RGB: vertical=False — столбцы вдоль X,
+# vertical=True — горизонтальные полосы вдоль Y (первое значение снизу)
+def render_bars(values, vertical=False, size=PLOT_SIZE, color=BAR_COLOR, margin=MARGIN):
+    image = _canvas(size)
+    area = _plot_area(image, margin)
+    height, width = area.shape[:2]
+    if vertical:
+        mask = _bars_mask(values, height, width).T[::-1]
+    else:
+        mask = _bars_mask(values, width, height)[::-1]
+    palette = np.array([(BACKGROUND,) * 3, color], dtype=np.uint8)
+    np.take(palette, mask.view(np.uint8), axis=0, out=area, mode='clip')
+    return image
+
+
+# Гистограмма значений (диапазон по умолчанию — от минимума до максимума данных)
+def render_histogram(data, bins=256, value_range=None, size=PLOT_SIZE, color=BAR_COLOR, margin=MARGIN):
+    data = np.asarray(data).ravel()
+    if value_range is None:
+        value_range = (data.min(), data.max()) if data.size else (0, 1)
+    counts, _ = np.histogram(data, bins=bins, range=value_range)
+    return render_bars(counts, size=size, color=color, margin=margin)
+
+
+# Тепловая карта матрицы (строка 0 сверху) с цветовой шкалой справа
+def render_heatmap(matrix, size=PLOT_SIZE, lut=VIRIDIS_LUT, margin=MARGIN):
+    matrix = np.asarray(matrix, dtype=np.float64)
+    image = _canvas(size)
+    area = _plot_area(image, margin)
+    height, width = area.shape[:2]
+
+    low, high = matrix.min(), matrix.max()
+    scale = 255 / (high - low) if high > low else 0.0
+    levels = np.rint((matrix - low) * scale).astype(np.uint8)
+    rows = np.arange(height) * matrix.shape[0] // height
+    columns = np.arange(width) * matrix.shape[1] // width
+    area[...] = lut[levels[np.ix_(rows, columns)]]
+
+    # Цветовая шкала: от максимума сверху до минимума снизу
+    bar_left = size[0] - margin + (margin - COLORBAR_WIDTH) // 2
+    gradient = 255 - np.arange(height) * 256 // height
+    image[margin:margin + height, bar_left:bar_left + COLORBAR_WIDTH] = lut[gradient][:, np.newaxis]
+    return image
+
+
+def save_png(image, path):
+    Image.fromarray(image).save(path)
+
+
+# Сохранение графиков с выбором отрисовки: 'fast' — numpy без подписей,
+# 'matplotlib' — подписи и оси, matplotlib импортируется только здесь
+def save_bars(values, path, vertical=False, backend='fast', title=None, xlabel=None, ylabel=None):
+    if backend == 'fast':
+        return save_png(render_bars(values, vertical), path)
+    plt = _pyplot(backend)
+    plt.figure()
+    if vertical:
+        plt.barh(range(len(values)), values)
+    else:
+        plt.bar(range(len(values)), values)
+    _finish(plt, path, title, xlabel, ylabel)
+
+
+def save_histogram(data, path, bins=256, backend='fast', title=None):
+    if backend == 'fast':
+        return save_png(render_histogram(data, bins), path)
+    plt = _pyplot(backend)
+    plt.figure()
+    plt.hist(np.asarray(data).ravel(), bins=bins)
+    _finish(plt, path, title)
+
+
+def save_heatmap(matrix, path, backend='fast', title=None, xlabel=None, ylabel=None, colorbar_label=None):
+    if backend == 'fast':
+        return save_png(render_heatmap(matrix), path)
+    plt = _pyplot(backend)
+    plt.figure(figsize=(10, 6))
+    plt.imshow(matrix, cmap='viridis', aspect='auto')
+    plt.colorbar(label=colorbar_label)
+    _finish(plt, path, title, xlabel, ylabel, dpi=100, tight=True)
+
+
+def _pyplot(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестный способ отрисовки: {backend}")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _finish(plt, path, title=None, xlabel=None, ylabel=None, dpi=None, tight=False):
+    if title is not None:
+        plt.title(title)
+    if xlabel is not None:
+        plt.xlabel(xlabel)
+    if ylabel is not None:
+        plt.ylabel(ylabel)
+    if tight:
+        plt.tight_layout()
+    plt.savefig(path, dpi=dpi)
+    plt.close()
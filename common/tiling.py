@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Размер стороны плитки по умолчанию
+TILE_SIZE = 512
+
+
+# Прямоугольники плиток (y0, y1, x0, x1), покрывающие изображение
+def tile_grid(height, width, tile_size=TILE_SIZE):
+    return [(y0, min(y0 + tile_size, height), x0, min(x0 + tile_size, width))
+            for y0 in range(0, height, tile_size) for x0 in range(0, width, tile_size)]
+
+
+def _halo_pair(halo):
+    return (halo, halo) if np.isscalar(halo) else tuple(halo)
+
+
+# Фильтр применяется к плитке с ореолом, обрезанным по краю изображения (поэтому
+# на краях фильтр видит ту же границу, что и на целом изображении); возвращается
+# результат только для самой плитки
+def _tile_result(func, image, box, halo):
+    y0, y1, x0, x1 = box
+    halo_y, halo_x = halo
+    height, width = image.shape[:2]
+    top, left = max(y0 - halo_y, 0), max(x0 - halo_x, 0)
+    result = func(np.asarray(image[top:min(y1 + halo_y, height), left:min(x1 + halo_x, width)]))
+    return result[y0 - top:y1 - top, x0 - left:x1 - left]
+
+
+def _run_tile(func, image, out, box, halo):
+    y0, y1, x0, x1 = box
+    out[y0:y1, x0:x1] = _tile_result(func, image, box, halo)
+
+
+# Состояние процесса-исполнителя: фильтр, ореол и массивы в общей памяти
+_worker = {}
+
+
+def _attach(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _init_worker(func, halo, image_spec, out_spec):
+    image_block, image = _attach(*image_spec)
+    out_block, out = _attach(*out_spec)
+    _worker.update(func=func, halo=halo, image=image, out=out, blocks=(image_block, out_block))
+
+
+def _worker_tile(box):
+    _run_tile(_worker['func'], _worker['image'], _worker['out'], box, _worker['halo'])
+
+
+def _shared_array(shape, dtype):
+    dtype = np.dtype(dtype)
+    size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+    block = shared_memory.SharedMemory(create=True, size=size)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+# Выполнение локального фильтра по плиткам с ореолом на пуле потоков или процессов.
+# func(region) возвращает массив размера region (возможно, с дополнительными осями
+# каналов); halo — радиус окрестности фильтра (число или пара (по y, по x)).
+# Если ореол не меньше радиуса фильтра, склеенный результат совпадает с результатом
+# фильтра на целом изображении. image и out могут быть memmap: в памяти одновременно
+# находятся только плитки и промежуточные массивы фильтра для них.
+# Потоки подходят для функций OpenCV и numpy, отпускающих GIL; при processes=True
+# изображение и результат размещаются в общей памяти, func должна сериализоваться pickle.
+def run_tiled(func, image, halo, out=None, tile_size=TILE_SIZE, workers=None, processes=False):
+    halo = _halo_pair(halo)
+    height, width = image.shape[:2]
+    boxes = tile_grid(height, width, tile_size)
+    workers = workers or os.cpu_count() or 1
+
+    # Первая плитка считается сразу: по ней определяются тип и форма результата
+    first = _tile_result(func, image, boxes[0], halo)
+    shape = (height, width) + first.shape[2:]
+    if out is None:
+        out = np.empty(shape, dtype=first.dtype)
+    elif out.shape != shape:
+        raise ValueError(f"Форма выходного массива {out.shape} не совпадает с {shape}")
+    y0, y1, x0, x1 = boxes[0]
+    out[y0:y1, x0:x1] = first
+    boxes = boxes[1:]
+
+    if len(boxes) == 0 or workers == 1:
+        for box in boxes:
+            _run_tile(func, image, out, box, halo)
+        return out
+
+    if not processes:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(_run_tile, func, image, out, box, halo) for box in boxes]:
+                future.result()
+        return out
+
+    image_block, shared_image = _shared_array(image.shape, image.dtype)
+    out_block, shared_out = _shared_array(shape, out.dtype)
+    try:
+        shared_image[...] = image
+        image_spec = (image_block.name, image.shape, image.dtype)
+        out_spec = (out_block.name, shape, out.dtype)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(func, halo, image_spec, out_spec)) as executor:
+            list(executor.map(_worker_tile, boxes))
+        for y0, y1, x0, x1 in boxes:
+            out[y0:y1, x0:x1] = shared_out[y0:y1, x0:x1]
+    finally:
+        del shared_image, shared_out
+        for block in (image_block, out_block):
+            block.close()
+            block.unlink()
+    return out
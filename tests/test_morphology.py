@@ -0,0 +1,34 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.morphology import dilate, dilate_diff, disk, erode, octagon, rectangle
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).integers(0, 256, (120, 150), dtype=np.uint8)
+
+
+# Диск радиуса больше 15 (элемент больше DIRECT_MAX_SIZE) раскладывается точно
+@pytest.mark.parametrize('radius', [16, 25, 40])
+def test_disk_matches_opencv(image, radius):
+    element = disk(radius)
+    assert np.array_equal(dilate(image, element), cv2.dilate(image, element))
+    assert np.array_equal(erode(image, element), cv2.erode(image, element))
+
+
+@pytest.mark.parametrize('element', [octagon(20), octagon(70), rectangle(41, 131), rectangle(3, 301)])
+def test_decomposed_elements_match_opencv(image, element):
+    assert np.array_equal(dilate(image, element), cv2.dilate(image, element))
+    assert np.array_equal(erode(image, element), cv2.erode(image, element))
+
+
+@pytest.mark.parametrize('element', [np.ones((3, 3), dtype=np.uint8), disk(20)])
+def test_dilate_diff_matches_separate_passes(image, element):
+    expected = cv2.absdiff(cv2.dilate(image, element), image)
+    assert np.array_equal(dilate_diff(image, element, band=16), expected)
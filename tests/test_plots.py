@@ -0,0 +1,22 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.plots import BACKGROUND, render_bars
+
+
+# Профиль пустого символа рисуется пустой областью построения
+def test_empty_bars():
+    for vertical in (False, True):
+        image = render_bars([], vertical=vertical, size=(100, 80), margin=10)
+        assert image.shape == (80, 100, 3)
+        assert (image[10:70, 10:90] == BACKGROUND).all()
+
+
+def test_bars_heights():
+    image = render_bars([0, 2, 4], size=(70, 50), margin=5)
+    area = image[5:45, 5:65, 0] != BACKGROUND
+    assert area.sum(axis=0)[:20].max() == 0
+    assert area.sum(axis=0)[-1] == 40
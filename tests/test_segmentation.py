@@ -0,0 +1,35 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'LAB6'))
+from segmentation import segment_page, word_gap_threshold
+
+
+# Страница из символов-прямоугольников с заданными промежутками по X
+def _line_page(widths, gaps, height=12):
+    page = np.zeros((height + 4, sum(widths) + sum(gaps) + 4), dtype=np.uint8)
+    x = 2
+    for width, gap in zip(widths, list(gaps) + [0]):
+        page[2:2 + height, x:x + width] = 1
+        x += width + gap
+    return page
+
+
+def test_threshold_separates_few_gaps():
+    assert 2 < word_gap_threshold([2, 23]) < 23
+    assert word_gap_threshold([]) == np.inf
+
+
+def test_two_word_line():
+    layout = segment_page(_line_page([5, 5, 5], [2, 23]))
+    assert len(layout.symbols) == 3
+    assert layout.symbol_words.tolist() == [0, 0, 1]
+    assert layout.words[:, 2:].tolist() == [[2, 14], [37, 42]]
+
+
+def test_many_gaps_use_median():
+    gaps = [2, 3, 2, 2, 3, 2, 12, 2, 3, 2]
+    layout = segment_page(_line_page([5] * (len(gaps) + 1), gaps))
+    assert len(layout.words) == 2
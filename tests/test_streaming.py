@@ -0,0 +1,25 @@
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'LAB1'))
+from colorspace import rgb_to_hsi
+from streaming import split_channels_streamed
+
+
+# Яркость потокового режима побайтно совпадает с LAB1/main.py (HSI в float64)
+def test_streamed_intensity_matches_in_memory(tmp_path):
+    image = np.random.default_rng(0).integers(0, 256, (301, 257, 3), dtype=np.uint8)
+    Image.fromarray(image).save(tmp_path / 'image.png')
+    output = tmp_path / 'out'
+    split_channels_streamed(str(tmp_path / 'image.png'), str(output), strip_height=64,
+                            hsi_path=str(tmp_path / 'hsi.npy'))
+
+    _, _, I = rgb_to_hsi(image, dtype=np.float64)
+    expected = (I * 255).astype(np.uint8)
+    assert np.array_equal(np.array(Image.open(output / 'I_component.png')), expected)
+    assert np.array_equal(np.array(Image.open(output / 'I_inverted.png')), 255 - expected)
+    assert np.array_equal(np.array(Image.open(output / 'R_channel.png')), image[..., 0])
+    assert np.allclose(np.load(tmp_path / 'hsi.npy')[..., 2], I, atol=1e-6)